@@ -1,17 +1,46 @@
-# apps/analytics/ga.py  (TEMP STUB FOR TESTING)
+# apps/analytics/ga.py
+"""
+Traffic summary / series for the traffic API, read from the local
+GA4 daily rollup (apps.pages.models.GaDailyMetric, see apps/pages/warehouse.py).
+
+Both functions expect an already clamped `days` (1..MAX_DAYS).
+"""
+from datetime import timedelta
 from typing import Dict, List
-from datetime import date, timedelta
-
-def get_summary(days: int = 7) -> Dict[str, int]:
-    # return fake numbers so we can confirm the endpoint works
-    return {"sessions": 123, "activeUsers": 45, "pageviews": 678, "days": days}
-
-def get_timeseries(days: int = 7) -> Dict[str, List]:
-    labels = []
-    data = []
-    today = date.today()
-    for i in range(days):
-        d = today - timedelta(days=days - 1 - i)
-        labels.append(d.isoformat())
-        data.append(10 + i)
-    return {"labels": labels, "data": data}
+
+from django.utils import timezone
+
+from apps.pages.warehouse import get_timeseries as _daily_rows, get_totals
+
+DEFAULT_DAYS = 7
+MAX_DAYS = 366
+
+# response key -> GA4 metric stored in the rollup
+FIELDS = {
+    "sessions": "sessions",
+    "activeUsers": "activeUsers",
+    "pageviews": "screenPageViews",
+}
+
+
+def _window(days: int):
+    today = timezone.localdate()
+    return today - timedelta(days=days - 1), today
+
+
+def get_summary(days: int = DEFAULT_DAYS) -> Dict[str, int]:
+    totals = get_totals(*_window(days))
+    out = {key: int(totals.get(metric, 0)) for key, metric in FIELDS.items()}
+    out["days"] = days
+    return out
+
+
+def get_timeseries(days: int = DEFAULT_DAYS) -> Dict[str, List]:
+    """
+    Column-oriented: one list per metric, aligned with `labels`.
+    """
+    rows = _daily_rows(*_window(days))
+    out: Dict[str, List] = {"labels": [r["date"] for r in rows]}
+    for key, metric in FIELDS.items():
+        out[key] = [r[metric] for r in rows]
+    return out
@@ -1,19 +1,43 @@
 # apps/analytics/views.py
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.http import JsonResponse
-from apps.analytics.ga import get_summary, get_timeseries
+from django.utils.cache import patch_cache_control
 
+from apps.analytics.ga import get_summary, get_timeseries, DEFAULT_DAYS, MAX_DAYS
+
+CACHE_TTL = 300  # seconds; the rollup only changes on GA sync
+
+
+@login_required(login_url="/login/")
 def traffic_api(request, days=None):
-    # accept ?days=7 or /traffic/7, default to 7 if bad/missing
-    raw = request.GET.get("days") or days or 7
+    # accept ?days=7 or /traffic/7, default to 7 if missing; 0 is clamped like any value
+    raw = request.GET.get("days")
+    if raw is None or raw == "":
+        raw = days
+    if raw is None:
+        raw = DEFAULT_DAYS
     try:
         d = int(raw)
     except (TypeError, ValueError):
-        d = 7  # fallback
+        return JsonResponse({"message": f"Input Error = days must be an integer, got {raw!r}",
+                             "success": False}, status=400)
 
-    try:
-        return JsonResponse({
-            "summary": get_summary(d),
-            "timeseries": get_timeseries(d),
-        })
-    except Exception as e:
-        return JsonResponse({"message": f"Input Error = {e}", "success": False}, status=500)
+    # clamp to what the rollup keeps; bounds memory and the cache key space
+    d = min(max(d, 1), MAX_DAYS)
+
+    key = f"analytics:traffic:{d}"
+    data = cache.get(key)
+    if data is None:
+        try:
+            data = {
+                "summary": get_summary(d),
+                "timeseries": get_timeseries(d),
+            }
+        except Exception as e:
+            return JsonResponse({"message": f"Input Error = {e}", "success": False}, status=500)
+        cache.set(key, data, CACHE_TTL)
+
+    response = JsonResponse(data)
+    patch_cache_control(response, private=True, max_age=CACHE_TTL)
+    return response
@@ -8,3 +8,7 @@ from django.apps import AppConfig
 class DynApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dyn_api'
+
+    def ready(self):
+        from apps.dyn_dt.registry import load_api
+        load_api()
@@ -0,0 +1,86 @@
+# -*- encoding: utf-8 -*-
+"""
+Query parameters of DynamicAPI lists, validated against the model:
+
+    ?fields=id,title           only these keys (and columns) are read
+    ?cost__gte=10&completed=1  filters: <field> or <field>__<lookup>,
+                               values parsed with the field class
+    ?ordering=-cost,title      sort (the pk breaks ties)
+
+Unknown fields, lookups or unparseable values are a QueryError (400).
+Password columns answer like unknown ones: comparing or sorting on a
+hash would let a client bisect it.
+"""
+
+from django.core.exceptions import ValidationError
+
+from apps.dyn_dt.utils import filter_lookup
+
+# Parameters that are not filters
+RESERVED = ('limit', 'offset', 'cursor', 'fields', 'ordering', 'format')
+
+LOOKUPS = ('exact', 'gt', 'gte', 'lt', 'lte', 'in', 'range', 'isnull')
+
+
+class QueryError(ValueError):
+    """Bad fields / filter / ordering parameters."""
+
+
+def _model_field(info, name):
+    # by name or attname (project / project_id); never credentials (e.g. User.password)
+    field = info.fields.get(name)
+    if field is None:
+        field = next((f for f in info.fields.values() if f.attname == name), None)
+    if field is not None and 'password' in field.name:
+        return None
+    return field
+
+
+def requested_fields(request, available):
+    """Keys asked for with ?fields=, in that order; None for all of them."""
+    value = request.GET.get('fields', '').strip()
+    if not value:
+        return None
+
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise QueryError('unknown fields: ' + ', '.join(unknown))
+    return list(dict.fromkeys(fields))
+
+
+def filter_queryset(request, queryset, info):
+    """`queryset` narrowed by every non-reserved query parameter."""
+    lookups = {}
+    for param in request.GET:
+        if param in RESERVED:
+            continue
+
+        name, _, lookup = param.partition('__')
+        field = _model_field(info, name)
+        lookup = lookup or 'exact'
+        if field is None or lookup not in LOOKUPS:
+            raise QueryError(f'unknown filter: {param}')
+
+        try:
+            lookups.update(filter_lookup(field, lookup, request.GET[param]))
+        except ValidationError as e:
+            raise QueryError(f'{param}: ' + ' '.join(e.messages))
+
+    return queryset.filter(**lookups) if lookups else queryset
+
+
+def ordering(request, info):
+    """order_by() arguments from ?ordering=a,-b."""
+    value = request.GET.get('ordering', '').strip()
+    if not value:
+        return []
+
+    order_by = []
+    for name in value.split(','):
+        name = name.strip()
+        field = _model_field(info, name.lstrip('-'))
+        if not name or field is None:
+            raise QueryError(f'unknown ordering: {name}')
+        order_by.append(('-' if name.startswith('-') else '') + field.name)
+    return order_by
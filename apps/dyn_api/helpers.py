@@ -12,23 +12,113 @@ from django.http import HttpResponseRedirect, HttpResponse
 
 from rest_framework import serializers
 
+from apps.dyn_dt.registry import api_model
+
 class Utils:
     @staticmethod
-    def get_class(config, name: str) -> models.Model:
-        return Utils.model_name_to_class(config[name])
+    def get_class(name: str) -> models.Model:
+        # resolved once at startup; KeyError for models not in DYNAMIC_API
+        return api_model(name).model
+
+    @staticmethod
+    def get_info(name: str):
+        # registry entry: model class, fields by name, options (page sizes, pagination mode)
+        return api_model(name)
 
     @staticmethod
-    def get_manager(config, name: str) -> models.Manager:
-        return Utils.get_class(config, name).objects
+    def get_manager(name: str) -> models.Manager:
+        return Utils.get_class(name).objects
+
+    # model class -> ModelSerializer subclass, built on first use
+    _serializers = {}
+
+    # model class -> [(key, column, to_representation)] for serialize_rows(),
+    # or None when the model needs the full serializer (m2m, computed, file fields)
+    _readers = {}
+
+    # model class -> keys of a serialized row
+    _field_names = {}
 
     @staticmethod
-    def get_serializer(config, name: str):
-        class Serializer(serializers.ModelSerializer):
-            class Meta:
-                model = Utils.get_class(config, name)
-                fields = '__all__'
+    def get_serializer(name: str, fields=None):
+        """ModelSerializer of the model; `fields` limits it (not cached)."""
+        model_class = Utils.get_class(name)
+        serializer = Utils._serializers.get(model_class) if not fields else None
+
+        if serializer is None:
+            class Serializer(serializers.ModelSerializer):
+                class Meta:
+                    model = model_class
+
+            Serializer.Meta.fields = list(fields) if fields else '__all__'
+            if not fields:
+                Utils._serializers[model_class] = Serializer
+            serializer = Serializer
+        return serializer
 
-        return Serializer
+    @staticmethod
+    def get_field_names(name: str):
+        """Keys a serialized row can have (?fields= choices)."""
+        model_class = Utils.get_class(name)
+        if model_class not in Utils._field_names:
+            Utils._field_names[model_class] = [
+                key for key, field in Utils.get_serializer(name)().fields.items() if not field.write_only
+            ]
+        return Utils._field_names[model_class]
+
+    @staticmethod
+    def get_readers(name: str):
+        model_class = Utils.get_class(name)
+        if model_class in Utils._readers:
+            return Utils._readers[model_class]
+
+        readers = []
+        for key, field in Utils.get_serializer(name)().fields.items():
+            if field.write_only:
+                continue
+            try:
+                model_field = model_class._meta.get_field(field.source)
+            except Exception:
+                readers = None
+                break
+            # file fields render from the FieldFile wrapper, not the stored name
+            if model_field.many_to_many or not model_field.concrete or isinstance(field, serializers.FileField):
+                readers = None
+                break
+            # FKs are rendered as their pk, which values() already holds
+            to_representation = None if isinstance(field, serializers.RelatedField) else field.to_representation
+            readers.append((key, model_field.attname, to_representation))
+
+        Utils._readers[model_class] = readers
+        return readers
+
+    @staticmethod
+    def serialize_rows(name: str, queryset, fields=None):
+        """
+        Serialized rows of `queryset`, same output as the ModelSerializer
+        with many=True, limited to `fields` when given. Models made of
+        plain columns are read with values_list() and rendered field by
+        field, without building model instances.
+        """
+        readers = Utils.get_readers(name)
+        if readers is None:
+            if fields:
+                meta = queryset.model._meta
+                columns = [f for f in fields if meta.get_field(f).concrete and not meta.get_field(f).many_to_many]
+                queryset = queryset.only(*columns)
+            return Utils.get_serializer(name, fields)(queryset, many=True).data
+
+        if fields:
+            by_key = {reader[0]: reader for reader in readers}
+            readers = [by_key[key] for key in fields]
+
+        rows = []
+        for values in queryset.values_list(*[column for _, column, _ in readers]).iterator():
+            row = {}
+            for (key, _, to_representation), value in zip(readers, values):
+                row[key] = value if value is None or to_representation is None else to_representation(value)
+            rows.append(row)
+        return rows
 
     @staticmethod
     def model_name_to_class(name: str):
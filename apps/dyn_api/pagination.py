@@ -0,0 +1,110 @@
+# -*- encoding: utf-8 -*-
+"""
+Pagination of DynamicAPI lists.
+
+    ?limit=50&offset=100     pages by position, with the total 'count'
+    ?cursor=<token>          keyset on id: each page costs the same and
+                             stays stable while rows are inserted
+
+Cursor mode is used when a cursor is passed or the entry sets
+'pagination': 'cursor'; its first page needs no cursor. Cursors are
+built from the row ids, so with ?fields= the list must include id
+(?cursor=...&fields=id,title) or the request is a 400; ?ordering= is a
+400 too. Page sizes are set per DYNAMIC_API entry:
+
+    DYNAMIC_API = {
+        'task': {'model': "projects.models.Task", 'page_size': 50, 'max_page_size': 500},
+    }
+"""
+
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.dyn_dt.pagination import encode_cursor, decode_cursor
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class PaginationError(ValueError):
+    """Bad limit / offset / cursor parameters."""
+
+
+def page_size(request, options):
+    default = options.get('page_size', PAGE_SIZE)
+    maximum = options.get('max_page_size', MAX_PAGE_SIZE)
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit <= 0:
+        raise PaginationError('limit must be positive')
+    return min(limit, maximum)
+
+
+def paginate(request, queryset, serialize, options, ordering=()):
+    """
+    (rows, envelope) of one page: `serialize(queryset)` renders the rows,
+    the envelope holds the links ('next', 'previous') and either 'count'
+    or the cursors. `ordering` (then the pk) sorts offset pages; cursor
+    pages always follow the pk.
+    """
+    limit = page_size(request, options)
+    url = request.build_absolute_uri()
+
+    if 'cursor' in request.GET or options.get('pagination') == 'cursor':
+        if ordering:
+            raise PaginationError('ordering is not supported with cursor pagination')
+        return _cursor_page(request, queryset, serialize, limit, url)
+
+    try:
+        offset = int(request.GET.get('offset', 0))
+    except ValueError:
+        raise PaginationError('offset must be an integer')
+    if offset < 0:
+        raise PaginationError('offset must not be negative')
+
+    count = queryset.count()
+    rows = serialize(queryset.order_by(*ordering, 'pk')[offset:offset + limit])
+
+    envelope = {'count': count, 'limit': limit, 'next': None, 'previous': None}
+    if offset + limit < count:
+        envelope['next'] = replace_query_param(replace_query_param(url, 'limit', limit), 'offset', offset + limit)
+    if offset > 0:
+        previous = replace_query_param(url, 'limit', limit)
+        envelope['previous'] = (remove_query_param(previous, 'offset') if offset <= limit
+                                else replace_query_param(previous, 'offset', offset - limit))
+    return rows, envelope
+
+
+def _cursor_page(request, queryset, serialize, limit, url):
+    cursor = request.GET.get('cursor', '')
+    position = decode_cursor(cursor) if cursor else None
+    if cursor and not position:
+        raise PaginationError('invalid cursor')
+    backwards = bool(position) and position[0] == 'prev'
+
+    pk = queryset.model._meta.pk.name
+    if position:
+        queryset = queryset.filter(pk__lt=position[2]) if backwards else queryset.filter(pk__gt=position[2])
+    queryset = queryset.order_by('-pk' if backwards else 'pk')
+
+    # one row past the page tells whether there is more
+    rows = list(serialize(queryset[:limit + 1]))
+    if rows and pk not in rows[0]:
+        raise PaginationError(f'fields must include {pk} with cursor pagination')
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    has_next = more if not backwards else True
+    has_previous = bool(position) and (more if backwards else True)
+
+    envelope = {'limit': limit, 'next_cursor': None, 'prev_cursor': None, 'next': None, 'previous': None}
+    if rows and has_next:
+        envelope['next_cursor'] = encode_cursor('next', None, rows[-1][pk])
+        envelope['next'] = replace_query_param(url, 'cursor', envelope['next_cursor'])
+    if rows and has_previous:
+        envelope['prev_cursor'] = encode_cursor('prev', None, rows[0][pk])
+        envelope['previous'] = replace_query_param(url, 'cursor', envelope['prev_cursor'])
+    return rows, envelope
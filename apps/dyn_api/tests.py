@@ -3,6 +3,170 @@
 Copyright (c) 2019 - present AppSeed.us
 """
 
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from projects.models import Project, Task
+
+API = {
+    'task': {'model': "projects.models.Task", 'page_size': 3, 'max_page_size': 5},
+    'task_cursor': {'model': "projects.models.Task", 'page_size': 3, 'pagination': 'cursor'},
+}
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class DynApiTestCase(TestCase):
+    """projects.Task served by DYNAMIC_API with small pages, a logged-in client."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._overrides = override_settings(DYNAMIC_API=API, CACHES=LOCMEM)
+        cls._overrides.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._overrides.disable()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+        cls.alpha = Project.objects.create(name='Alpha', start_date=date(2025, 1, 1))
+        cls.tasks = [
+            Task.objects.create(project=cls.alpha, title=f'task {i}', time_taken=i, cost=i * 10)
+            for i in range(8)
+        ]
+        cls.ids = [task.id for task in cls.tasks]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get(self, name, **params):
+        return self.client.get(reverse('model_api', args=[name]), params)
+
+    def assertInputError(self, response, message):
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+        self.assertIn(message, response.json()['message'])
+
+
+class OffsetPaginationTests(DynApiTestCase):
+
+    def test_pages_by_offset(self):
+        body = self.get('task').json()
+        self.assertEqual(body['count'], 8)
+        self.assertEqual(body['limit'], 3)
+        self.assertEqual([row['id'] for row in body['data']], self.ids[:3])
+        self.assertIn('offset=3', body['next'])
+        self.assertIsNone(body['previous'])
+
+        body = self.get('task', offset=6).json()
+        self.assertEqual([row['id'] for row in body['data']], self.ids[6:])
+        self.assertIsNone(body['next'])
+        self.assertIn('offset=3', body['previous'])
+
+        # back to the first page: no offset at all
+        body = self.get('task', offset=2).json()
+        self.assertNotIn('offset', body['previous'])
+
+    def test_limit_is_capped(self):
+        body = self.get('task', limit=100).json()
+        self.assertEqual(body['limit'], 5)
+        self.assertEqual(len(body['data']), 5)
+
+    def test_bad_parameters(self):
+        self.assertInputError(self.get('task', limit='many'), 'limit must be an integer')
+        self.assertInputError(self.get('task', limit=0), 'limit must be positive')
+        self.assertInputError(self.get('task', offset=-1), 'offset must not be negative')
+
+
+class CursorPaginationTests(DynApiTestCase):
+
+    def walk(self, **params):
+        pages, body = [], self.get('task_cursor', **params).json()
+        pages.append(body)
+        while body['next_cursor']:
+            body = self.get('task_cursor', cursor=body['next_cursor'], **params).json()
+            pages.append(body)
+        return pages
+
+    def test_walks_forward_and_back(self):
+        pages = self.walk()
+        ids = [row['id'] for page in pages for row in page['data']]
+        self.assertEqual(ids, self.ids)
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['prev_cursor'])
+
+        body = self.get('task_cursor', cursor=pages[-1]['prev_cursor']).json()
+        self.assertEqual([row['id'] for row in body['data']], self.ids[3:6])
+        self.assertIsNotNone(body['next_cursor'])
+
+    def test_cursor_param_switches_offset_entries(self):
+        body = self.get('task').json()
+        self.assertIn('count', body)
+        first = self.get('task_cursor').json()
+        body = self.get('task', cursor=first['next_cursor']).json()
+        self.assertEqual([row['id'] for row in body['data']], self.ids[3:6])
+
+    def test_fields_must_include_id(self):
+        self.assertInputError(self.get('task_cursor', fields='title'),
+                              'fields must include id with cursor pagination')
+
+        pages = self.walk(fields='id,title')
+        self.assertEqual([row['id'] for page in pages for row in page['data']], self.ids)
+        self.assertEqual(set(pages[0]['data'][0]), {'id', 'title'})
+
+    def test_offset_fields_need_no_id(self):
+        body = self.get('task', fields='title').json()
+        self.assertEqual(body['data'][0], {'title': 'task 0'})
+
+    def test_bad_parameters(self):
+        self.assertInputError(self.get('task_cursor', cursor='garbage'), 'invalid cursor')
+        self.assertInputError(self.get('task_cursor', ordering='-cost'),
+                              'ordering is not supported with cursor pagination')
+
+
+@override_settings(DYNAMIC_API={**API, 'user': "django.contrib.auth.models.User"})
+class FilterTests(DynApiTestCase):
+
+    def ids_of(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.json()['data']]
+
+    def test_lookups(self):
+        self.assertEqual(self.ids_of(self.get('task', cost=30)), self.ids[3:4])
+        self.assertEqual(self.ids_of(self.get('task', cost__gte=60)), self.ids[6:])
+        self.assertEqual(self.ids_of(self.get('task', cost__lt=20, time_taken__gt=0)), self.ids[1:2])
+        self.assertEqual(self.ids_of(self.get('task', cost__in='10, 50,70')),
+                         [self.ids[1], self.ids[5], self.ids[7]])
+        self.assertEqual(self.ids_of(self.get('task', cost__range='20,40')), self.ids[2:5])
+        self.assertEqual(self.ids_of(self.get('task', project_id=self.alpha.id, limit=5)), self.ids[:5])
+        self.assertEqual(self.ids_of(self.get('task', assigned_to__isnull='true', limit=1)), self.ids[:1])
+
+    def test_reserved_parameters_are_not_filters(self):
+        body = self.get('task', limit=2, offset=2, fields='id', ordering='-cost', format='json').json()
+        self.assertEqual([row['id'] for row in body['data']], [self.ids[5], self.ids[4]])
+
+    def test_ordering(self):
+        self.assertEqual(self.ids_of(self.get('task', ordering='-cost', limit=3)), self.ids[:-4:-1])
+        self.assertInputError(self.get('task', ordering='-nope'), 'unknown ordering: -nope')
+
+    def test_input_errors(self):
+        self.assertInputError(self.get('task', nope=1), 'unknown filter: nope')
+        self.assertInputError(self.get('task', cost__icontains='1'), 'unknown filter: cost__icontains')
+        self.assertInputError(self.get('task', cost__gte='cheap'), 'cost__gte:')
+        self.assertInputError(self.get('task', cost__in='10,cheap'), 'cost__in:')
+        self.assertInputError(self.get('task', cost__range='10'), 'range expects "low,high"')
+        self.assertInputError(self.get('task', fields='id,nope'), 'unknown fields: nope')
+
+    def test_password_is_not_filterable(self):
+        self.assertEqual(self.ids_of(self.get('user', username='tester')), [self.user.id])
+        self.assertInputError(self.get('user', password__gte='pbkdf2'), 'unknown filter: password__gte')
+        self.assertInputError(self.get('user', password='x'), 'unknown filter: password')
+        self.assertInputError(self.get('user', ordering='password'), 'unknown ordering: password')
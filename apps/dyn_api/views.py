@@ -16,14 +16,9 @@ from django.http import HttpResponse
 
 from django.conf import settings
 
-DYNAMIC_API = {}
-
-try:
-    DYNAMIC_API = getattr(settings, 'DYNAMIC_API') 
-except:     
-    pass 
-
 from .helpers import Utils 
+from .pagination import paginate, PaginationError
+from .filters import requested_fields, filter_queryset, ordering, QueryError
 
 def index(request):
     
@@ -57,15 +52,34 @@ class DynamicAPI(APIView):
                         'success': False
                     }, status=400)
 
-                thing = get_object_or_404(Utils.get_manager(DYNAMIC_API, kwargs.get('model_name')), id=model_id)
-                model_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'))(instance=thing)
+                thing = get_object_or_404(Utils.get_manager(kwargs.get('model_name')), id=model_id)
+                model_serializer = Utils.get_serializer(kwargs.get('model_name'))(instance=thing)
                 output = model_serializer.data
+                page = {}
+
+                try:
+                    fields = requested_fields(request, Utils.get_field_names(kwargs.get('model_name')))
+                except QueryError as e:
+                    return Response(data={
+                        'message': 'Input Error = ' + str(e),
+                        'success': False
+                    }, status=400)
+                if fields:
+                    output = {key: output[key] for key in fields}
             else:
-                all_things = Utils.get_manager(DYNAMIC_API, kwargs.get('model_name')).all()
-                thing_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'))
-                output = []
-                for thing in all_things:
-                    output.append(thing_serializer(instance=thing).data)
+                model_name = kwargs.get('model_name')
+                info = Utils.get_info(model_name)
+                try:
+                    fields = requested_fields(request, Utils.get_field_names(model_name))
+                    all_things = filter_queryset(request, Utils.get_manager(model_name).all(), info)
+                    output, page = paginate(request, all_things,
+                                            lambda rows: Utils.serialize_rows(model_name, rows, fields),
+                                            info.options, ordering(request, info))
+                except (QueryError, PaginationError) as e:
+                    return Response(data={
+                        'message': 'Input Error = ' + str(e),
+                        'success': False
+                    }, status=400)
         except KeyError:
             return Response(data={
                 'message': 'this model is not activated or not exist.',
@@ -78,6 +92,7 @@ class DynamicAPI(APIView):
             }, status=404)
         return Response(data={
             'data': output,
+            **page,
             'success': True
             }, status=200)
 
@@ -85,7 +100,7 @@ class DynamicAPI(APIView):
     #@check_permission
     def post(self, request, **kwargs):
         try:
-            model_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'))(data=request.data)
+            model_serializer = Utils.get_serializer(kwargs.get('model_name'))(data=request.data)
             if model_serializer.is_valid():
                 model_serializer.save()
             else:
@@ -107,10 +122,10 @@ class DynamicAPI(APIView):
     #@check_permission
     def put(self, request, **kwargs):
         try:
-            thing = get_object_or_404(Utils.get_manager(DYNAMIC_API, kwargs.get('model_name')), id=kwargs.get('id'))
-            model_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'))(instance=thing,
-                                                                                           data=request.data,
-                                                                                           partial=True)
+            thing = get_object_or_404(Utils.get_manager(kwargs.get('model_name')), id=kwargs.get('id'))
+            model_serializer = Utils.get_serializer(kwargs.get('model_name'))(instance=thing,
+                                                                              data=request.data,
+                                                                              partial=True)
             if model_serializer.is_valid():
                 model_serializer.save()
             else:
@@ -137,7 +152,7 @@ class DynamicAPI(APIView):
     #@check_permission
     def delete(self, request, **kwargs):
         try:
-            model_manager = Utils.get_manager(DYNAMIC_API, kwargs.get('model_name'))
+            model_manager = Utils.get_manager(kwargs.get('model_name'))
             to_delete_id = kwargs.get('id')
             model_manager.get(id=to_delete_id).delete()
         except KeyError:
@@ -145,7 +160,7 @@ class DynamicAPI(APIView):
                 'message': 'this model is not activated or not exist.',
                 'success': False
             }, status=400)
-        except Utils.get_class(DYNAMIC_API, kwargs.get('model_name')).DoesNotExist as e:
+        except Utils.get_class(kwargs.get('model_name')).DoesNotExist as e:
             return Response(data={
                 'message': 'object with given id not found.',
                 'success': False
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 class DynDtConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dyn_dt'
+
+    def ready(self):
+        from apps.dyn_dt.registry import load_datatb
+        from apps.dyn_dt.signals import connect_model_signals
+        load_datatb()
+        connect_model_signals()
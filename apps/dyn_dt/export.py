@@ -0,0 +1,218 @@
+"""
+Streaming exports of dyn_dt tables.
+
+Rows are read with values_list(...).iterator() in EXPORT_CHUNK_SIZE
+batches, so memory stays flat whatever the table size. FK columns are
+exported as str() of the related object, resolved with one in_bulk()
+per batch.
+
+    csv_chunks()    CSV text (optionally through gzip_chunks())
+    arrow_chunks()  Parquet or Arrow IPC stream, one record batch per
+                    chunk, typed from the model fields (needs pyarrow)
+"""
+
+import csv
+import importlib.util
+import io
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+from apps.dyn_dt.models import ModelFilter
+from apps.dyn_dt.utils import search_queryset, saved_filters, table_config
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object for csv.writer: write() hands the line back."""
+
+    def write(self, value):
+        return value
+
+
+def table_snapshot(info, aPath):
+    """
+    Visible columns and saved filters of the table, as JSON for an
+    ExportJob: the worker process must not depend on its own copy of
+    the table config.
+    """
+    config = table_config(aPath.lower(), info.db_fields)
+    return {
+        'fields': [column.key for column in config['columns'] if not column.value],
+        'filters': [{'key': f.key, 'operator': f.operator, 'value': f.value} for f in config['filters']],
+    }
+
+
+def export_queryset(params, info, aPath, table=None):
+    """
+    (queryset, fields, fk_models) of an export of a registry entry:
+    visible columns, saved filters, and the search / order_by of
+    `params` (request.GET, or the params saved on an ExportJob) as on
+    the table page. `table` is a table_snapshot() taken when the export
+    was queued; without it the current table config is used.
+    """
+    aModelClass = info.model
+    db_fields = info.db_fields
+    if table is None:
+        table = table_snapshot(info, aPath)
+    fields = [f for f in table['fields'] if f in db_fields]
+
+    filters = [ModelFilter(parent=aPath.lower(), **f) for f in table['filters']]
+    filter_string = saved_filters(filters, info.fields)
+
+    order_by = params.get('order_by', 'id')
+    if order_by not in db_fields:
+        order_by = 'id'
+
+    queryset = aModelClass.objects.filter(**filter_string).order_by(order_by)
+    if params.get('search'):
+        queryset = search_queryset(queryset, params['search'], db_fields, info.fk_models.keys(),
+                                   ranked='order_by' not in params)
+    return queryset, fields, info.fk_models
+
+
+def iter_batches(queryset, fields, fk_models, progress=None):
+    """
+    Lists of at most EXPORT_CHUNK_SIZE rows (lists of values) of `fields`.
+    progress(n) is called with the size of each batch.
+    """
+    if not fields:
+        return
+
+    batch = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        batch.append(list(row))
+        if len(batch) == EXPORT_CHUNK_SIZE:
+            yield _fk_labels(batch, fields, fk_models)
+            if progress:
+                progress(len(batch))
+            batch = []
+    if batch:
+        yield _fk_labels(batch, fields, fk_models)
+        if progress:
+            progress(len(batch))
+
+
+def _fk_labels(batch, fields, fk_models):
+    for i, field in enumerate(fields):
+        if field not in fk_models:
+            continue
+        ids = {row[i] for row in batch if row[i] is not None}
+        related = fk_models[field].objects.in_bulk(ids)
+        for row in batch:
+            if row[i] is not None:
+                row[i] = str(related[row[i]]) if row[i] in related else ''
+    return batch
+
+
+def csv_chunks(queryset, fields, fk_models, progress=None):
+    """CSV text: the header, then one string per batch."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for batch in iter_batches(queryset, fields, fk_models, progress):
+        yield ''.join(writer.writerow(row) for row in batch)
+
+
+def gzip_chunks(chunks):
+    """gzip-encode a stream of str, flushing after each chunk so bytes leave at once."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+# -----------------------
+# Parquet / Arrow
+# -----------------------
+
+ARROW_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def arrow_type(field, pa):
+    """Arrow type of a model field; FKs and anything unknown are strings."""
+    if field.is_relation:
+        return pa.string()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.AutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC' if settings.USE_TZ else None)
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    if isinstance(field, models.TimeField):
+        return pa.time64('us')
+    return pa.string()
+
+
+def arrow_schema(aModelClass, fields, pa):
+    columns = []
+    for name in fields:
+        field = aModelClass._meta.get_field(name)
+        # FK labels can be '' / None for dangling or empty relations
+        columns.append(pa.field(name, arrow_type(field, pa), nullable=field.null or field.is_relation))
+    return pa.schema(columns)
+
+
+def has_pyarrow():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose bytes are collected by the stream between batches."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_chunks(queryset, fields, fk_models, fmt='parquet', progress=None):
+    """
+    Parquet (one row group per batch) or Arrow IPC stream bytes.
+    Check has_pyarrow() first: the import happens on the first chunk.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(queryset.model, fields, pa)
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema) if fmt == 'parquet' else pa.ipc.new_stream(sink, schema)
+
+    strings = {i for i, f in enumerate(schema) if pa.types.is_string(f.type)}
+    try:
+        for batch in iter_batches(queryset, fields, fk_models, progress):
+            columns = [[row[i] for row in batch] for i in range(len(fields))]
+            for i in strings:
+                columns[i] = [None if v is None else str(v) for v in columns[i]]
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=f.type) for values, f in zip(columns, schema)], schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
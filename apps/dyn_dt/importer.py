@@ -0,0 +1,277 @@
+"""
+Bulk CSV import into DYNAMIC_DATATB models.
+
+The upload is read as a stream in IMPORT_CHUNK_SIZE rows. Per chunk:
+every cell is cleaned with its model field (type, max_length, choices),
+FK ids are resolved with one in_bulk() per FK column, unique fields are
+checked against the file and the table, and the valid rows are inserted
+with bulk_create. Invalid rows are skipped and reported. A batch still
+refused by the database (other constraints, concurrent writes) is
+inserted row by row so only the offending rows are reported.
+
+Columns are matched on field name (or attname, e.g. project_id). The
+auto pk and non-editable fields (auto_now_add, ...) are ignored, and FK
+cells hold either the related pk or its label (str() of the related
+row, as written by the exports), so an export can be imported back as
+new rows. Labels shared by several related rows are rejected.
+"""
+
+import csv
+import io
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from apps.dyn_dt import search
+from apps.dyn_dt.utils import bump_model_cache_version, TRUE_VALUES, FALSE_VALUES
+
+IMPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 500    # rows per INSERT
+MAX_REPORTED_ERRORS = 100  # row errors returned; all of them are counted
+
+
+class CSVImportError(Exception):
+    """The file cannot be imported at all (bad encoding, unknown columns)."""
+
+
+def import_columns(aModelClass, header):
+    """
+    Map CSV columns to fields. Returns (columns, ignored) where columns
+    is a list of (position, field).
+    """
+    by_name = {}
+    for field in aModelClass._meta.fields:
+        by_name[field.name] = field
+        by_name[field.attname] = field
+
+    columns, ignored, unknown = [], [], []
+    for position, name in enumerate(header):
+        name = name.strip()
+        field = by_name.get(name)
+        if field is None:
+            unknown.append(name)
+        elif (field.primary_key and isinstance(field, models.AutoField)) or not field.editable:
+            ignored.append(name)
+        else:
+            columns.append((position, field))
+
+    if unknown:
+        raise CSVImportError('Unknown columns: ' + ', '.join(unknown))
+
+    # left out, these would make every row fail on insert
+    imported = {field for _, field in columns}
+    missing = [
+        field.name for field in aModelClass._meta.fields
+        if field not in imported and field.editable and not isinstance(field, models.AutoField)
+        and not field.null and field.get_default() is None
+    ]
+    if missing:
+        raise CSVImportError('Missing required columns: ' + ', '.join(missing))
+    return columns, ignored
+
+
+def clean_value(field, raw):
+    """Python value of one cell; raises ValidationError."""
+    if raw == '' and not isinstance(field, (models.CharField, models.TextField)):
+        if field.null:
+            return None
+        if field.has_default():
+            return field.get_default()
+        raise ValidationError('This field is required.')
+
+    if field.is_relation:
+        return field.target_field.to_python(raw)
+
+    if isinstance(field, models.BooleanField) and raw.lower() in TRUE_VALUES + FALSE_VALUES:
+        raw = raw.lower() in TRUE_VALUES
+
+    value = field.clean(raw, None)
+    if isinstance(value, datetime) and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class _Label(str):
+    """FK cell that is not a valid pk: resolved by label."""
+
+
+def _fk_labels(field, labels):
+    """str() of every related row -> its pk (None when shared), built once per import."""
+    if field not in labels:
+        by_label = {}
+        for obj in field.related_model._default_manager.all().iterator():
+            label = str(obj)
+            by_label[label] = None if label in by_label else obj.pk
+        labels[field] = by_label
+    return labels[field]
+
+
+def _import_chunk(aModelClass, columns, chunk, result, labels):
+    rows = []
+    for line, cells in chunk:
+        values, errors = {}, {}
+        for position, field in columns:
+            raw = cells[position].strip() if position < len(cells) else ''
+            try:
+                values[field] = clean_value(field, raw)
+            except ValidationError as e:
+                if field.is_relation and raw:
+                    values[field] = _Label(raw)
+                else:
+                    errors[field.name] = ' '.join(e.messages)
+        if errors:
+            _add_error(result, line, errors)
+        else:
+            rows.append((line, values))
+
+    # FK ids: one in_bulk per column for the whole chunk, then labels
+    for _, field in columns:
+        if not field.is_relation:
+            continue
+        ids = {values[field] for _, values in rows
+               if values[field] is not None and not isinstance(values[field], _Label)}
+        found = set(field.related_model._default_manager.in_bulk(ids)) if ids else set()
+        valid = []
+        for line, values in rows:
+            value = values[field]
+            if value is None or (value in found and not isinstance(value, _Label)):
+                valid.append((line, values))
+                continue
+            by_label = _fk_labels(field, labels)
+            label = str(value)
+            if by_label.get(label) is not None:
+                values[field] = by_label[label]
+                valid.append((line, values))
+            elif label in by_label:
+                _add_error(result, line, {field.name: f'Several {field.related_model.__name__} rows are labelled "{label}".'})
+            else:
+                _add_error(result, line, {field.name: f'{field.related_model.__name__} {label} does not exist.'})
+        rows = valid
+
+    for fields in unique_sets(aModelClass, columns):
+        rows = _check_unique(aModelClass, fields, rows, result)
+
+    objs = [(line, aModelClass(**{field.attname: value for field, value in values.items()})) for line, values in rows]
+    created = []
+    for start in range(0, len(objs), IMPORT_BATCH_SIZE):
+        created += _insert(aModelClass, objs[start:start + IMPORT_BATCH_SIZE], result)
+    search.sync_instances(aModelClass, created)
+    result['created'] += len(created)
+
+
+def unique_sets(aModelClass, columns):
+    """
+    Field tuples that must be unique (unique fields, unique_together,
+    unconditional UniqueConstraints) and are all imported columns.
+    """
+    imported = {field.name: field for _, field in columns}
+    opts = aModelClass._meta
+    names = [(f.name,) for f in opts.fields if f.unique]
+    names += [tuple(together) for together in opts.unique_together]
+    names += [tuple(c.fields) for c in opts.total_unique_constraints]
+
+    sets = []
+    for group in dict.fromkeys(names):
+        if group and all(name in imported for name in group):
+            sets.append(tuple(imported[name] for name in group))
+    return sets
+
+
+def _check_unique(aModelClass, fields, rows, result):
+    """Rows whose `fields` values are new to the chunk and the table."""
+    def key(values):
+        return tuple(values[field] for field in fields)
+
+    # NULLs never collide
+    keys = {key(values) for _, values in rows if None not in key(values)}
+    first = fields[0]
+    existing = set()
+    if keys:
+        firsts = list({k[0] for k in keys})
+        for start in range(0, len(firsts), IMPORT_BATCH_SIZE):
+            existing.update(
+                aModelClass._default_manager
+                .filter(**{f'{first.attname}__in': firsts[start:start + IMPORT_BATCH_SIZE]})
+                .values_list(*(field.attname for field in fields))
+            )
+
+    label = ', '.join(field.name for field in fields)
+    seen, valid = set(), []
+    for line, values in rows:
+        k = key(values)
+        if None in k:
+            valid.append((line, values))
+        elif k in existing:
+            _add_error(result, line, {label: 'A row with this value already exists.'})
+        elif k in seen:
+            _add_error(result, line, {label: 'Duplicate of an earlier row in the file.'})
+        else:
+            seen.add(k)
+            valid.append((line, values))
+    return valid
+
+
+def _insert(aModelClass, batch, result):
+    """bulk_create one batch; on a database error, retry row by row and report the refused rows."""
+    try:
+        with transaction.atomic():
+            return aModelClass.objects.bulk_create([obj for _, obj in batch])
+    except IntegrityError:
+        pass
+
+    created = []
+    for line, obj in batch:
+        try:
+            with transaction.atomic():
+                created += aModelClass.objects.bulk_create([obj])
+        except IntegrityError as e:
+            _add_error(result, line, {'row': str(e)})
+    return created
+
+
+def _add_error(result, line, errors):
+    result['error_count'] += 1
+    if len(result['errors']) < MAX_REPORTED_ERRORS:
+        result['errors'].append({'row': line, 'errors': errors})
+
+
+def import_csv(aModelClass, upload):
+    """
+    Import an uploaded CSV file. Valid rows are inserted in one
+    transaction; returns {'created', 'error_count', 'errors', 'ignored'}.
+    """
+    stream = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+    reader = csv.reader(stream)
+
+    try:
+        header = next(reader, None)
+        if not header:
+            raise CSVImportError('The file is empty.')
+        columns, ignored = import_columns(aModelClass, header)
+
+        result = {'created': 0, 'error_count': 0, 'errors': [], 'ignored': ignored}
+        labels = {}  # FK field -> {label: pk}
+        with transaction.atomic():
+            chunk = []
+            for cells in reader:
+                if not any(cells):
+                    continue
+                chunk.append((reader.line_num, cells))
+                if len(chunk) == IMPORT_CHUNK_SIZE:
+                    _import_chunk(aModelClass, columns, chunk, result, labels)
+                    chunk = []
+            if chunk:
+                _import_chunk(aModelClass, columns, chunk, result, labels)
+    except UnicodeDecodeError:
+        raise CSVImportError('The file is not UTF-8 encoded.')
+    except csv.Error as e:
+        raise CSVImportError(f'Line {reader.line_num}: {e}')
+    finally:
+        stream.detach()
+
+    if result['created']:
+        bump_model_cache_version(aModelClass)
+    return result
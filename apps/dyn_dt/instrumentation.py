@@ -0,0 +1,173 @@
+"""
+Query / render budget of dyn_dt pages.
+
+QueryBudgetMiddleware measures every request served by apps.dyn_dt
+views: number of queries, SQL time, the most repeated statements
+(fingerprinted: literals and IN lists folded) and template render time.
+The numbers go out as a Server-Timing header (visible in the browser
+devtools) and as one JSON log line on the 'apps.dyn_dt.instrumentation'
+logger, at WARNING when the page runs more than
+DYNAMIC_DATATB_QUERY_BUDGET queries.
+
+Template time is measured for views returning a TemplateResponse (the
+dyn_dt pages do), between process_template_response() and the
+response's post-render callback; the project's template backend is
+left alone.
+
+In tests, query_budget() fails a block that goes over the budget:
+
+    with query_budget(10):
+        self.client.get(reverse('model_dt', args=['task']))
+
+Streamed bodies (CSV / Parquet exports) run their queries after the
+response leaves the middleware; only the setup queries are counted.
+"""
+
+import contextvars
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET = 15  # default of DYNAMIC_DATATB_QUERY_BUDGET
+TOP_FINGERPRINTS = 3
+
+_current = contextvars.ContextVar('dyn_dt_budget', default=None)
+
+
+def query_budget_limit():
+    # read per call, so override_settings() in tests applies
+    return getattr(settings, 'DYNAMIC_DATATB_QUERY_BUDGET', QUERY_BUDGET)
+
+
+def fingerprint(sql):
+    """SQL with literals replaced by ? and IN lists folded, to group repeats."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql.replace('%s', '?'))
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+    return ' '.join(sql.split())
+
+
+class Budget:
+    """Queries and render time of one request (or one query_budget() block)."""
+
+    def __init__(self, parent=None):
+        self.parent = parent  # enclosing Budget, e.g. query_budget() around a request
+        self.queries = Counter()
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def repeated(self, limit=TOP_FINGERPRINTS):
+        return [(sql, count) for sql, count in self.queries.most_common(limit) if count > 1]
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries[fingerprint(sql)] += 1
+
+
+@contextmanager
+def measure():
+    """Collect the queries and template time of the block into a Budget."""
+    budget = Budget(_current.get())
+    token = _current.set(budget)
+    try:
+        with connection.execute_wrapper(budget):
+            yield budget
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries=None):
+    """
+    Test helper: AssertionError when the block runs more than
+    `max_queries` (default DYNAMIC_DATATB_QUERY_BUDGET) queries.
+    """
+    max_queries = query_budget_limit() if max_queries is None else max_queries
+    with measure() as budget:
+        yield budget
+
+    if budget.query_count > max_queries:
+        repeated = '\n'.join(f'  {count}x {sql}' for sql, count in budget.repeated())
+        raise AssertionError(
+            f'{budget.query_count} queries, budget is {max_queries}'
+            + (f'; repeated:\n{repeated}' if repeated else '')
+        )
+
+
+def _add_template_time(budget, elapsed):
+    # counted in the enclosing budgets too, e.g. query_budget() around a request
+    while budget is not None:
+        budget.template_time += elapsed
+        budget = budget.parent
+
+
+class QueryBudgetMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        view = self.dyn_dt_view(request)
+        if not view:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with measure() as budget:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join((
+            f'sql;dur={budget.sql_time * 1000:.1f};desc="{budget.query_count} queries"',
+            f'tpl;dur={budget.template_time * 1000:.1f};desc="template"',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+        record = {
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': budget.query_count,
+            'sql_ms': round(budget.sql_time * 1000, 1),
+            'template_ms': round(budget.template_time * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'repeated': [{'sql': sql, 'count': count} for sql, count in budget.repeated()],
+        }
+        level = logging.WARNING if budget.query_count > query_budget_limit() else logging.INFO
+        logger.log(level, json.dumps(record))
+        return response
+
+    def process_template_response(self, request, response):
+        budget = _current.get()
+        if budget is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: _add_template_time(budget, time.perf_counter() - start))
+        return response
+
+    def dyn_dt_view(self, request):
+        """Name of the dyn_dt view serving `request`, or None for other apps."""
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if not getattr(match.func, '__module__', '').startswith('apps.dyn_dt'):
+            return None
+        return match.url_name or match.func.__name__
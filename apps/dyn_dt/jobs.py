@@ -0,0 +1,128 @@
+"""
+Background exports of dyn_dt tables.
+
+The table page queues an ExportJob, with the table's visible columns and
+saved filters of that moment; `python manage.py dyn_dt_export_worker`
+claims pending jobs and runs them in a thread pool, off the request
+path. Each job streams its rows in EXPORT_CHUNK_SIZE batches (see
+export.py) into MEDIA_ROOT/exports/<path>-<id>.<ext>, recording
+rows_written after every batch so the page can poll its progress.
+
+Files and jobs older than DYNAMIC_DATATB_EXPORT_TTL seconds (default:
+one day) are removed by cleanup(), which the worker runs between polls.
+
+A running job beats its heartbeat_at on every batch. One silent for
+DYNAMIC_DATATB_EXPORT_STALE seconds (default: five minutes), e.g. its
+worker was killed, goes back to pending, or fails after
+EXPORT_MAX_ATTEMPTS runs.
+"""
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.dyn_dt.export import export_queryset, csv_chunks, arrow_chunks, has_pyarrow, ARROW_FORMATS
+from apps.dyn_dt.models import ExportJob
+from apps.dyn_dt.registry import datatb_model
+
+EXPORT_DIR = 'exports'
+EXPORT_TTL = getattr(settings, 'DYNAMIC_DATATB_EXPORT_TTL', 24 * 60 * 60)
+EXPORT_STALE = getattr(settings, 'DYNAMIC_DATATB_EXPORT_STALE', 5 * 60)
+EXPORT_MAX_ATTEMPTS = 2
+
+EXTENSIONS = {'csv': 'csv', 'parquet': ARROW_FORMATS['parquet'][1]}
+
+
+def requeue_stale(stale=EXPORT_STALE):
+    """
+    Running jobs without a heartbeat for `stale` seconds go back to
+    pending, or fail once they used EXPORT_MAX_ATTEMPTS; returns how many.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale)
+    dead = ExportJob.objects.filter(Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+                                    status='running')
+    failed = dead.filter(attempts__gte=EXPORT_MAX_ATTEMPTS).update(
+        status='failed', error='The export worker stopped responding.', finished_at=timezone.now())
+    requeued = dead.filter(attempts__lt=EXPORT_MAX_ATTEMPTS).update(
+        status='pending', started_at=None, heartbeat_at=None, rows_written=0)
+    return failed + requeued
+
+
+def claim(limit):
+    """
+    Mark up to `limit` pending jobs as running and return them. The
+    status-guarded update lets several workers share one queue. Stale
+    running jobs are requeued first.
+    """
+    requeue_stale()
+    claimed = []
+    for pk in ExportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)[:limit]:
+        now = timezone.now()
+        if ExportJob.objects.filter(pk=pk, status='pending').update(
+                status='running', started_at=now, heartbeat_at=now, attempts=F('attempts') + 1):
+            claimed.append(ExportJob.objects.get(pk=pk))
+    return claimed
+
+
+def run(job):
+    """Write the export file of a claimed job; failures are recorded on the job."""
+    name = f'{EXPORT_DIR}/{job.parent}-{job.pk}.{EXTENSIONS[job.format]}'
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    # per attempt: a run given up as stale may still be writing its own
+    partial = f'{path}.{job.attempts}.part'
+    # updates of this attempt only, not of a later one that took the job over
+    current = ExportJob.objects.filter(pk=job.pk, status='running', attempts=job.attempts)
+
+    def progress(rows):
+        current.update(rows_written=F('rows_written') + rows, heartbeat_at=timezone.now())
+
+    try:
+        info = datatb_model(job.parent)
+        if not info:
+            raise ValueError('Getting ModelClass for path: ' + job.parent)
+        if job.format == 'parquet' and not has_pyarrow():
+            raise ValueError('pyarrow is not installed (pip install pyarrow)')
+
+        queryset, fields, fk_models = export_queryset(job.params, info, job.parent, job.params.get('table'))
+        current.update(total_rows=queryset.count(), rows_written=0, heartbeat_at=timezone.now())
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if job.format == 'csv':
+            with open(partial, 'w', newline='', encoding='utf-8') as f:
+                for chunk in csv_chunks(queryset, fields, fk_models, progress):
+                    f.write(chunk)
+        else:
+            with open(partial, 'wb') as f:
+                for chunk in arrow_chunks(queryset, fields, fk_models, job.format, progress):
+                    f.write(chunk)
+        os.replace(partial, path)
+
+        if current.update(status='done', file=name, finished_at=timezone.now()):
+            print(f'[dyn_dt] Export {job.pk} ({job.parent}.{job.format}) done')
+        else:
+            print(f'[dyn_dt] Export {job.pk} ({job.parent}.{job.format}) was taken over, result dropped')
+    except Exception as e:
+        if os.path.exists(partial):
+            os.remove(partial)
+        current.update(status='failed', error=str(e), finished_at=timezone.now())
+        print(f'[dyn_dt] Export {job.pk} ({job.parent}.{job.format}) failed: {e}')
+    finally:
+        # worker threads each hold their own connection
+        connection.close()
+
+
+def cleanup(ttl=EXPORT_TTL):
+    """Delete finished jobs older than `ttl` seconds and their files; returns how many."""
+    old = ExportJob.objects.filter(status__in=('done', 'failed'),
+                                   finished_at__lt=timezone.now() - timedelta(seconds=ttl))
+    count = 0
+    for job in old:
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
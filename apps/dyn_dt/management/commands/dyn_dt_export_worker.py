@@ -0,0 +1,41 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.dyn_dt import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued dyn_dt exports in a thread pool and remove expired export files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2,
+                            help="Exports run at the same time (default: %(default)s)")
+        parser.add_argument("--poll", type=float, default=5,
+                            help="Seconds between queue checks (default: %(default)s)")
+        parser.add_argument("--ttl", type=int, default=jobs.EXPORT_TTL,
+                            help="Seconds finished exports are kept (default: %(default)s)")
+        parser.add_argument("--once", action="store_true",
+                            help="Run the pending exports, then exit")
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 1)
+        running = set()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                removed = jobs.cleanup(options["ttl"])
+                if removed:
+                    self.stdout.write(f"[dyn_dt] {removed} expired export(s) removed")
+
+                running = {future for future in running if not future.done()}
+                for job in jobs.claim(workers - len(running)):
+                    self.stdout.write(f"[dyn_dt] Export {job.pk} ({job.parent}.{job.format}) started")
+                    running.add(pool.submit(jobs.run, job))
+
+                if options["once"] and not running:
+                    break
+                time.sleep(options["poll"] if not options["once"] else 0.2)
+
+        self.stdout.write(self.style.SUCCESS("[dyn_dt] Export worker stopped"))
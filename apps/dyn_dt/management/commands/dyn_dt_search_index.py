@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.dyn_dt import search
+from apps.dyn_dt.registry import datatb_model
+
+
+class Command(BaseCommand):
+    help = "Build (or drop) the full-text search index of DYNAMIC_DATATB models."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*",
+                            help="DYNAMIC_DATATB keys (default: all of them)")
+        parser.add_argument("--drop", action="store_true",
+                            help="Drop the indexes; searches fall back to icontains")
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        if not backend:
+            self.stderr.write("No search backend for this database.")
+            return
+
+        paths = options["paths"] or list(settings.DYNAMIC_DATATB.keys())
+        for aPath in paths:
+            info = datatb_model(aPath)
+            if not info:
+                self.stderr.write(f"[dyn_dt] Skipping {aPath}: model not found")
+                continue
+            aModelClass = info.model
+            if not backend.supports(aModelClass):
+                self.stderr.write(f"[dyn_dt] Skipping {aPath}: no text fields or non-integer pk")
+                continue
+
+            if options["drop"]:
+                backend.drop(aModelClass)
+                message = f"[dyn_dt] Search index dropped for {aPath}"
+            else:
+                backend.build(aModelClass)
+                message = f"[dyn_dt] Search index built for {aPath}"
+
+            search.forget(aModelClass)
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-18 22:44
+
+from django.db import migrations, models
+
+
+def drop_duplicate_filters(apps, schema_editor):
+    # keep the newest filter of each (parent, key) before adding the constraint
+    ModelFilter = apps.get_model('dyn_dt', 'ModelFilter')
+    seen = set()
+    duplicates = []
+    for pk, parent, key in ModelFilter.objects.order_by('-id').values_list('id', 'parent', 'key'):
+        if (parent, key) in seen:
+            duplicates.append(pk)
+        seen.add((parent, key))
+    ModelFilter.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dyn_dt', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelfilter',
+            name='operator',
+            field=models.CharField(choices=[('icontains', 'contains'), ('startswith', 'starts with'), ('exact', 'equals'), ('in', 'in (a,b,...)'), ('range', 'between (low,high)'), ('gte', '>='), ('lte', '<='), ('isnull', 'is empty (true/false)')], default='icontains', max_length=16),
+        ),
+        migrations.RunPython(drop_duplicate_filters, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='modelfilter',
+            constraint=models.UniqueConstraint(fields=('parent', 'key'), name='dyn_dt_modelfilter_parent_key'),
+        ),
+    ]
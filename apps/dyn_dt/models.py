@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -16,9 +17,67 @@ class HideShowFilter(models.Model):
 		return self.key
 
 class ModelFilter(models.Model):
+	OPERATORS = (
+		('icontains', _('contains')),
+		('startswith', _('starts with')),
+		('exact', _('equals')),
+		('in', _('in (a,b,...)')),
+		('range', _('between (low,high)')),
+		('gte', _('>=')),
+		('lte', _('<=')),
+		('isnull', _('is empty (true/false)')),
+	)
+
 	parent = models.CharField(max_length=255, null=True, blank=True)
 	key = models.CharField(max_length=255)
+	operator = models.CharField(max_length=16, choices=OPERATORS, default='icontains')
 	value = models.CharField(max_length=255)
 
+	class Meta:
+		# one filter per column; also serves the lookups by parent
+		constraints = [
+			models.UniqueConstraint(fields=['parent', 'key'], name='dyn_dt_modelfilter_parent_key'),
+		]
+
 	def __str__(self):
-		return self.key
\ No newline at end of file
+		return self.key
+
+
+class ExportJob(models.Model):
+	"""An export run off the request path by the dyn_dt_export_worker command."""
+	STATUSES = (
+		('pending', _('Pending')),
+		('running', _('Running')),
+		('done', _('Done')),
+		('failed', _('Failed')),
+	)
+	FORMATS = (
+		('csv', 'CSV'),
+		('parquet', 'Parquet'),
+	)
+
+	parent = models.CharField(max_length=255)  # DYNAMIC_DATATB key
+	format = models.CharField(max_length=16, choices=FORMATS, default='csv')
+	params = models.JSONField(default=dict, blank=True)  # search / order_by of the table page
+	status = models.CharField(max_length=16, choices=STATUSES, default='pending', db_index=True)
+	total_rows = models.IntegerField(null=True, blank=True)
+	rows_written = models.IntegerField(default=0)
+	file = models.FileField(upload_to='exports/', blank=True)
+	error = models.TextField(blank=True)
+	created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+	created_at = models.DateTimeField(auto_now_add=True)
+	started_at = models.DateTimeField(null=True, blank=True)
+	heartbeat_at = models.DateTimeField(null=True, blank=True)  # last sign of life of the running worker
+	attempts = models.PositiveSmallIntegerField(default=0)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	def __str__(self):
+		return f'{self.parent}.{self.format} ({self.status})'
+
+	@property
+	def progress(self):
+		if self.status == 'done':
+			return 100
+		if not self.total_rows:
+			return 0
+		return min(99, int(self.rows_written * 100 / self.total_rows))
@@ -0,0 +1,151 @@
+"""
+Keyset pagination for dyn_dt tables.
+
+Enabled per model in DYNAMIC_DATATB:
+
+    DYNAMIC_DATATB = {
+        'task': {'model': "projects.models.Task", 'pagination': 'keyset'},
+    }
+
+Pages are walked with an opaque `?cursor=` holding the (order_by, id)
+of the first / last row shown, so page 1000 costs the same as page 1
+and no COUNT(*) is run. The total shown is an estimate from the
+planner statistics (sqlite_stat1 after ANALYZE, pg_class.reltuples or
+EXPLAIN on PostgreSQL), or nothing when none is available.
+"""
+
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F, Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder cuts times to milliseconds; rows sharing the
+    # millisecond would be skipped. decode keeps the string for to_python().
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(direction, value, pk):
+    raw = json.dumps([direction, value, pk], cls=CursorEncoder)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(direction, value, pk) or None for a missing / bad cursor."""
+    try:
+        direction, value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if direction not in ('next', 'prev'):
+        return None
+    return direction, value, pk
+
+
+def estimate_count(queryset, filtered):
+    """
+    Row count from planner statistics, without scanning the table.
+    None when the database has no estimate to give.
+    """
+    table = queryset.model._meta.db_table
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            if filtered:
+                sql, params = queryset.order_by().query.sql_with_params()
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] > 0 else None
+
+        if connection.vendor == 'sqlite' and not filtered:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # first number of any index stat of the table is its row count
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+
+    return None
+
+
+class KeysetPage:
+    """
+    One page of `queryset` ordered by (`order_by`, pk), NULLs first.
+    Iterates like a Paginator page; the template links with
+    `next_cursor` / `previous_cursor`.
+    """
+    is_keyset = True
+
+    def __init__(self, queryset, order_by, per_page, cursor=None, filtered=False):
+        model = queryset.model
+        pk = model._meta.pk.name
+        field = model._meta.get_field(order_by)
+        self.field = field
+
+        position = decode_cursor(cursor) if cursor else None
+        backwards = bool(position) and position[0] == 'prev'
+
+        if field.name == pk:
+            ordering = [F(pk).desc()] if backwards else [F(pk).asc()]
+        elif backwards:
+            ordering = [F(order_by).desc(nulls_last=True), F(pk).desc()]
+        else:
+            ordering = [F(order_by).asc(nulls_first=True), F(pk).asc()]
+
+        queryset = queryset.order_by(*ordering)
+        self.count = estimate_count(queryset, filtered)
+        if position:
+            queryset = queryset.filter(self._after(field, pk, position))
+
+        rows = list(queryset[:per_page + 1])
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        self.object_list = rows
+        self.has_next = more if not backwards else True
+        self.has_previous = bool(position) and (more if backwards else True)
+        self.next_cursor = self._cursor('next', rows[-1]) if rows and self.has_next else ''
+        self.previous_cursor = self._cursor('prev', rows[0]) if rows and self.has_previous else ''
+
+    def _after(self, field, pk, position):
+        """Rows strictly after (or, going back, before) the cursor row."""
+        direction, raw, last_pk = position
+        value = field.to_python(raw) if raw is not None else None
+
+        if field.name == pk:
+            return Q(pk__lt=value) if direction == 'prev' else Q(pk__gt=value)
+
+        name = field.name
+        if direction == 'next':
+            if value is None:
+                return Q(**{f'{name}__isnull': True, 'pk__gt': last_pk}) | Q(**{f'{name}__isnull': False})
+            return Q(**{f'{name}__gt': value}) | Q(**{name: value, 'pk__gt': last_pk})
+
+        if value is None:
+            return Q(**{f'{name}__isnull': True, 'pk__lt': last_pk})
+        return (Q(**{f'{name}__lt': value}) | Q(**{name: value, 'pk__lt': last_pk})
+                | Q(**{f'{name}__isnull': True}))
+
+    def _cursor(self, direction, row):
+        return encode_cursor(direction, getattr(row, self.field.attname), row.pk)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
@@ -0,0 +1,113 @@
+"""
+Registry of the models served by dyn_dt and dyn_api.
+
+Built once, when the apps are ready, from DYNAMIC_DATATB and
+DYNAMIC_API: the model class and everything the views used to derive
+from _meta on each request (field lists, type buckets, FK targets,
+choices, searchable columns). Request handlers do a dict lookup:
+
+    info = datatb_model(aPath)   # ModelInfo or None
+    info = api_model(name)       # ModelInfo, KeyError when not exposed
+
+Entries whose model cannot be imported are skipped with a warning, so
+they answer like unknown paths. The registries are rebuilt when a test
+overrides either setting.
+"""
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import models
+from django.dispatch import receiver
+
+from apps.dyn_dt.search import text_fields
+from cli import name_to_class
+
+DATATB = {}  # DYNAMIC_DATATB key -> ModelInfo
+API = {}     # DYNAMIC_API key -> ModelInfo
+
+
+def entry_model_name(entry):
+    """Dotted model path of a setting entry: the path itself or a dict with 'model'."""
+    if isinstance(entry, dict):
+        return entry.get('model', '')
+    return entry or ''
+
+
+class ModelInfo:
+    """Model class of one registered path and its precomputed metadata."""
+
+    def __init__(self, path, model_name, aModelClass, options=None):
+        self.path = path
+        self.model_name = model_name
+        self.model = aModelClass
+        self.options = options or {}
+
+        fields = aModelClass._meta.fields
+        self.fields = {field.name: field for field in fields}
+        self.db_fields = [field.name for field in fields]
+
+        # same shape as cli.get_model_fk(): name -> "module.Class"
+        self.fk_models = {
+            field.name: field.related_model for field in fields
+            if type(field) is models.ForeignKey
+        }
+        self.fk_fields = {
+            name: related.__module__ + '.' + related.__name__
+            for name, related in self.fk_models.items()
+        }
+        self.db_filters = [name for name in self.db_fields if name not in self.fk_fields]
+
+        self.choices = {field.name: field.choices for field in fields if field.choices}
+        self.editable = {field.name: field for field in fields if field.editable and not field.primary_key}
+
+        all_fields = aModelClass._meta.get_fields()
+        self.integer_fields = [f.name for f in all_fields if isinstance(f, models.IntegerField)]
+        self.date_time_fields = [f.name for f in all_fields if isinstance(f, models.DateTimeField)]
+        self.email_fields = [f.name for f in all_fields if isinstance(f, models.EmailField)]
+        self.text_fields = [f.name for f in all_fields if isinstance(f, (models.TextField, models.CharField))]
+
+        # columns covered by the full-text index
+        self.search_fields = text_fields(aModelClass)
+
+    def __repr__(self):
+        return f'<ModelInfo {self.path}: {self.model_name}>'
+
+
+def build(config, label):
+    registry = {}
+    for path, entry in config.items():
+        model_name = entry_model_name(entry)
+        aModelClass = name_to_class(model_name)
+        if not aModelClass:
+            print(f'[{label}] Skipping {path}: model {model_name!r} not found')
+            continue
+        registry[path] = ModelInfo(path, model_name, aModelClass, entry if isinstance(entry, dict) else {})
+    return registry
+
+
+def load_datatb():
+    DATATB.clear()
+    DATATB.update(build(getattr(settings, 'DYNAMIC_DATATB', {}), 'dyn_dt'))
+
+
+def load_api():
+    API.clear()
+    API.update(build(getattr(settings, 'DYNAMIC_API', {}), 'dyn_api'))
+
+
+def datatb_model(aPath):
+    return DATATB.get(aPath)
+
+
+def api_model(name):
+    return API[name]
+
+
+@receiver(setting_changed)
+def reload_registry(setting, **kwargs):
+    if setting == 'DYNAMIC_DATATB':
+        from apps.dyn_dt.signals import connect_model_signals
+        load_datatb()
+        connect_model_signals()
+    elif setting == 'DYNAMIC_API':
+        load_api()
@@ -0,0 +1,341 @@
+"""
+Full-text search for dyn_dt tables.
+
+user_filter() asks `search()` first and only falls back to the OR of
+`icontains` lookups on every column when the model has no index yet:
+
+    sqlite      FTS5 virtual table <db_table>_fts (rowid = pk), kept in
+                sync by the post_save / post_delete signals
+    postgresql  GIN index on to_tsvector() of the text columns,
+                maintained by PostgreSQL itself
+
+Indexes cover the Char / Text fields of the model and are built with:
+
+    python manage.py dyn_dt_search_index [path ...] [--drop]
+
+With an index, text columns match whole words and word prefixes
+("proj" finds "project", "ject" does not). The other columns (numbers,
+dates, ...) are not indexed and keep their icontains lookup next to the
+match, see unindexed_fields() / condition(); results are then no longer
+ranked.
+
+Rows written with bulk_create / queryset.update() skip the signals:
+call sync_instances() or re-run the command after such writes.
+"""
+
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DatabaseError, connection, models
+from django.db.models.expressions import RawSQL
+
+from cli import name_to_class
+
+# Seconds a process trusts its "is there an index" answer
+EXISTS_TTL = 60
+
+_exists = {}  # label -> (exists, checked_at)
+
+
+def text_fields(aModelClass):
+    # never index credentials (e.g. User.password)
+    return [
+        f.column for f in aModelClass._meta.fields
+        if isinstance(f, (models.CharField, models.TextField)) and 'password' not in f.name
+    ]
+
+
+# Non-text columns whose icontains can only match a term with a digit
+NUMERIC_FIELDS = (models.IntegerField, models.DecimalField, models.FloatField, models.BooleanField,
+                  models.DateField, models.TimeField, models.DurationField)
+
+
+def unindexed_fields(aModelClass, names, term):
+    """
+    Fields among `names` the index does not cover and `term` could still
+    match with icontains. Text columns are left to the index, even those
+    it skips on purpose (passwords).
+    """
+    has_digit = any(c.isdigit() for c in term)
+    fields = []
+    for name in names:
+        try:
+            field = aModelClass._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if isinstance(field, (models.CharField, models.TextField)):
+            continue
+        if isinstance(field, NUMERIC_FIELDS) and not has_digit:
+            continue
+        fields.append(name)
+    return fields
+
+
+def _terms(term):
+    return re.findall(r'\w+', term)
+
+
+class SearchBackend:
+    """Interface of a search backend; every method is per model."""
+
+    def supports(self, aModelClass):
+        pk = aModelClass._meta.pk
+        return bool(text_fields(aModelClass)) and isinstance(pk, (models.AutoField, models.IntegerField))
+
+    def exists(self, aModelClass):
+        raise NotImplementedError
+
+    def build(self, aModelClass):
+        raise NotImplementedError
+
+    def drop(self, aModelClass):
+        raise NotImplementedError
+
+    def filter(self, queryset, term, ranked):
+        raise NotImplementedError
+
+    def condition(self, aModelClass, term):
+        """Boolean expression true for the rows matching `term`, to OR with other lookups."""
+        raise NotImplementedError
+
+    def sync(self, instance):
+        pass
+
+    def sync_many(self, instances):
+        for instance in instances:
+            self.sync(instance)
+
+    def remove(self, instance):
+        pass
+
+
+class SQLiteFTSBackend(SearchBackend):
+
+    def table(self, aModelClass):
+        return f'{aModelClass._meta.db_table}_fts'
+
+    def exists(self, aModelClass):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                           [self.table(aModelClass)])
+            return cursor.fetchone() is not None
+
+    def build(self, aModelClass):
+        qn = connection.ops.quote_name
+        fts = qn(self.table(aModelClass))
+        columns = ', '.join(qn(c) for c in text_fields(aModelClass))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+            cursor.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, tokenize = 'unicode61')")
+            cursor.execute(
+                f'INSERT INTO {fts} (rowid, {columns}) '
+                f'SELECT {qn(aModelClass._meta.pk.column)}, {columns} FROM {qn(aModelClass._meta.db_table)}'
+            )
+
+    def drop(self, aModelClass):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {connection.ops.quote_name(self.table(aModelClass))}')
+
+    def match(self, term):
+        # every word, as a prefix: "foo"* "bar"*
+        return ' '.join('"%s"*' % t.replace('"', '""') for t in _terms(term))
+
+    def filter(self, queryset, term, ranked):
+        match = self.match(term)
+
+        aModelClass = queryset.model
+        qn = connection.ops.quote_name
+        fts = self.table(aModelClass)
+        pk = f'{qn(aModelClass._meta.db_table)}.{qn(aModelClass._meta.pk.column)}'
+
+        queryset = queryset.extra(
+            tables=[fts],
+            where=[f'{qn(fts)}.rowid = {pk}', f'{qn(fts)} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'{qn(fts)}.rank'},
+        )
+        # bm25 rank: lower is better
+        return queryset.order_by('search_rank') if ranked else queryset
+
+    def condition(self, aModelClass, term):
+        qn = connection.ops.quote_name
+        fts = qn(self.table(aModelClass))
+        pk = f'{qn(aModelClass._meta.db_table)}.{qn(aModelClass._meta.pk.column)}'
+        return RawSQL(f'{pk} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)', [self.match(term)],
+                      output_field=models.BooleanField())
+
+    def sync(self, instance):
+        aModelClass = type(instance)
+        qn = connection.ops.quote_name
+        fts = qn(self.table(aModelClass))
+        fields = [f for f in aModelClass._meta.fields if f.column in text_fields(aModelClass)]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {fts} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                f"INSERT INTO {fts} (rowid, {', '.join(qn(f.column) for f in fields)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(fields))})",
+                [instance.pk] + [getattr(instance, f.attname) for f in fields],
+            )
+
+    def sync_many(self, instances):
+        # bulk_create skips post_save: index the new rows in two statements
+        if not instances:
+            return
+        aModelClass = type(instances[0])
+        qn = connection.ops.quote_name
+        fts = qn(self.table(aModelClass))
+        fields = [f for f in aModelClass._meta.fields if f.column in text_fields(aModelClass)]
+
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {fts} WHERE rowid = %s', [[i.pk] for i in instances])
+            cursor.executemany(
+                f"INSERT INTO {fts} (rowid, {', '.join(qn(f.column) for f in fields)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(fields))})",
+                [[i.pk] + [getattr(i, f.attname) for f in fields] for i in instances],
+            )
+
+    def remove(self, instance):
+        fts = connection.ops.quote_name(self.table(type(instance)))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {fts} WHERE rowid = %s', [instance.pk])
+
+
+class PostgresFTSBackend(SearchBackend):
+    config = 'simple'
+
+    def index(self, aModelClass):
+        return f'{aModelClass._meta.db_table}_fts_idx'[:63]
+
+    def vector(self, aModelClass):
+        # must match the indexed expression exactly for the GIN index to be used
+        qn = connection.ops.quote_name
+        table = qn(aModelClass._meta.db_table)
+        columns = " || ' ' || ".join(f"coalesce({table}.{qn(c)}, '')" for c in text_fields(aModelClass))
+        return f"to_tsvector('{self.config}', {columns})"
+
+    def exists(self, aModelClass):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_indexes WHERE indexname = %s', [self.index(aModelClass)])
+            return cursor.fetchone() is not None
+
+    def build(self, aModelClass):
+        qn = connection.ops.quote_name
+        index = qn(self.index(aModelClass))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX IF EXISTS {index}')
+            cursor.execute(
+                f'CREATE INDEX {index} ON {qn(aModelClass._meta.db_table)} '
+                f'USING GIN (({self.vector(aModelClass)}))'
+            )
+
+    def drop(self, aModelClass):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(self.index(aModelClass))}')
+
+    def query(self, term):
+        return ' & '.join(f'{t}:*' for t in _terms(term))
+
+    def filter(self, queryset, term, ranked):
+        query = self.query(term)
+
+        vector = self.vector(queryset.model)
+        tsquery = f"to_tsquery('{self.config}', %s)"
+        queryset = queryset.extra(
+            where=[f'{vector} @@ {tsquery}'],
+            params=[query],
+            select={'search_rank': f'ts_rank({vector}, {tsquery})'},
+            select_params=[query],
+        )
+        return queryset.order_by('-search_rank') if ranked else queryset
+
+    def condition(self, aModelClass, term):
+        return RawSQL(f"{self.vector(aModelClass)} @@ to_tsquery('{self.config}', %s)", [self.query(term)],
+                      output_field=models.BooleanField())
+
+
+BACKENDS = {
+    'sqlite': 'apps.dyn_dt.search.SQLiteFTSBackend',
+    'postgresql': 'apps.dyn_dt.search.PostgresFTSBackend',
+}
+
+
+def get_backend():
+    """
+    Backend for the default database, or None. DYNAMIC_DATATB_SEARCH_BACKEND
+    (dotted path, '' to disable) overrides the choice by vendor.
+    """
+    path = getattr(settings, 'DYNAMIC_DATATB_SEARCH_BACKEND', BACKENDS.get(connection.vendor))
+    if not path:
+        return None
+    backend_class = name_to_class(path)
+    return backend_class() if backend_class else None
+
+
+def has_index(aModelClass, max_age=EXISTS_TTL):
+    label = aModelClass._meta.label_lower
+    cached = _exists.get(label)
+    if cached and time.monotonic() - cached[1] < max_age:
+        return cached[0]
+
+    backend = get_backend()
+    exists = bool(backend and backend.supports(aModelClass) and backend.exists(aModelClass))
+    _exists[label] = (exists, time.monotonic())
+    return exists
+
+
+def forget(aModelClass):
+    _exists.pop(aModelClass._meta.label_lower, None)
+
+
+def search(queryset, term, ranked=True):
+    """
+    `queryset` narrowed to rows matching every word of `term` (as
+    prefixes), best matches first when `ranked`. None when the model
+    has no index or `term` has no words, so the caller can fall back
+    to icontains.
+    """
+    # The queryset runs after we return, so a DatabaseError can't be caught
+    # here: check the index is still there (dropped by another process)
+    # instead of trusting the cached answer.
+    if not _terms(term) or not has_index(queryset.model, max_age=0):
+        return None
+    return get_backend().filter(queryset, term, ranked)
+
+
+def condition(aModelClass, term):
+    """
+    Boolean expression matching `term` against the index, for ORing with
+    lookups on unindexed columns. Only valid once search() returned a
+    queryset.
+    """
+    return get_backend().condition(aModelClass, term)
+
+
+def _update_index(aModelClass, method, *args):
+    try:
+        getattr(get_backend(), method)(*args)
+    except DatabaseError as e:
+        # dropped since has_index() cached its answer: ask again next time
+        forget(aModelClass)
+        print(f'[dyn_dt] Search index of {aModelClass._meta.label} not updated: {e}')
+
+
+def sync_instance(sender, instance, **kwargs):
+    if has_index(sender):
+        _update_index(sender, 'sync', instance)
+
+
+def sync_instances(aModelClass, instances):
+    """Index rows written without signals (bulk_create); they need a pk."""
+    instances = [i for i in instances if i.pk is not None]
+    if instances and has_index(aModelClass):
+        _update_index(aModelClass, 'sync_many', instances)
+
+
+def remove_instance(sender, instance, **kwargs):
+    if has_index(sender):
+        _update_index(sender, 'remove', instance)
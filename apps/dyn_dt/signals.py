@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+
+from apps.dyn_dt.utils import bump_model_cache_version
+from apps.dyn_dt import registry, search
+
+
+def invalidate_model_cache(sender, **kwargs):
+    bump_model_cache_version(sender)
+
+
+def connect_model_signals():
+    """
+    Drop cached per-model data (column summaries) and update the search
+    index whenever a DYNAMIC_DATATB row changes.
+    """
+    for info in registry.DATATB.values():
+        aModelClass = info.model
+        uid = f'dyn_dt:{aModelClass._meta.label_lower}'
+        post_save.connect(invalidate_model_cache, sender=aModelClass, dispatch_uid=uid)
+        post_delete.connect(invalidate_model_cache, sender=aModelClass, dispatch_uid=uid)
+        post_save.connect(search.sync_instance, sender=aModelClass, dispatch_uid=f'{uid}:search')
+        post_delete.connect(search.remove_instance, sender=aModelClass, dispatch_uid=f'{uid}:search')
@@ -1,3 +1,322 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.dyn_dt import jobs, search
+from apps.dyn_dt.export import csv_chunks, export_queryset
+from apps.dyn_dt.importer import CSVImportError, import_csv
+from apps.dyn_dt.instrumentation import query_budget
+from apps.dyn_dt.models import ExportJob, ModelFilter
+from apps.dyn_dt.pagination import KeysetPage
+from apps.dyn_dt.registry import datatb_model
+from apps.dyn_dt.utils import search_queryset
+from projects.models import Project, Task
+
+DATATB = {'task': "projects.models.Task", 'project': "projects.models.Project"}
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+TASK_FIELDS = ['id', 'project', 'assigned_to', 'title', 'description', 'time_taken', 'cost', 'created_at',
+               'completed']
+
+
+class DynDtTestCase(TestCase):
+    """Tables of projects.Task / Project registered in DYNAMIC_DATATB, a private cache."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._overrides = override_settings(DYNAMIC_DATATB=DATATB, CACHES=LOCMEM)
+        cls._overrides.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._overrides.disable()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alpha = Project.objects.create(name='Alpha', start_date=date(2025, 1, 1))
+        cls.beta = Project.objects.create(name='Beta', start_date=date(2025, 2, 1))
+
+    def setUp(self):
+        cache.clear()
+        search.forget(Task)
+        self.addCleanup(search.forget, Task)
+
+    def task(self, title, cost=0, project=None, **kwargs):
+        return Task.objects.create(project=project or self.alpha, title=title, time_taken=0, cost=cost, **kwargs)
+
+
+class SearchTests(DynDtTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.numbers = self.task('Number crunching', cost=90)
+        self.widget = self.task('widget', cost=5)
+        self.widgets = self.task('a widget among many other words', cost=7)
+
+    def build_index(self):
+        call_command('dyn_dt_search_index', 'task', stdout=StringIO())
+        self.addCleanup(call_command, 'dyn_dt_search_index', 'task', '--drop', stdout=StringIO())
+
+    def titles(self, term, ranked=True):
+        return [t.title for t in search_queryset(Task.objects.all(), term, TASK_FIELDS, ['project', 'assigned_to'],
+                                                 ranked=ranked)]
+
+    def test_fallback_without_index(self):
+        self.assertIsNone(search.search(Task.objects.all(), 'umber'))
+        self.assertEqual(self.titles('umber'), ['Number crunching'])
+
+    def test_indexed_prefix_match_ranked(self):
+        self.build_index()
+        self.assertIsNotNone(search.search(Task.objects.all(), 'widg'))
+        # bm25: the short title is the better match
+        self.assertEqual(self.titles('widg'), ['widget', 'a widget among many other words'])
+        self.assertEqual(self.titles('numb'), ['Number crunching'])
+
+    def test_indexed_search_skips_infixes(self):
+        # words and word prefixes only, documented in apps/dyn_dt/search.py
+        self.build_index()
+        self.assertEqual(self.titles('umber'), [])
+
+    def test_indexed_keeps_icontains_on_numbers(self):
+        self.build_index()
+        self.assertEqual(self.titles('90', ranked=False), ['Number crunching'])
+
+    def test_index_follows_save_and_delete(self):
+        self.build_index()
+        zebra = self.task('zebra crossing')
+        self.assertEqual(self.titles('zebra'), ['zebra crossing'])
+
+        zebra.title = 'giraffe'
+        zebra.save()
+        self.assertEqual(self.titles('zebra'), [])
+        self.assertEqual(self.titles('giraffe'), ['giraffe'])
+
+        zebra.delete()
+        self.assertEqual(self.titles('giraffe'), [])
+
+    def test_dropped_index_falls_back(self):
+        self.build_index()
+        self.assertTrue(search.has_index(Task))
+
+        # dropped by another process: this one still trusts its cached answer
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE projects_task_fts')
+        self.assertEqual(self.titles('umber'), ['Number crunching'])
+
+        self.task('saved without an index')
+        self.assertFalse(search.has_index(Task))
+
+
+class KeysetPageTests(DynDtTestCase):
+
+    def setUp(self):
+        super().setUp()
+        users = [User.objects.create(username=f'user{i}') for i in range(3)]
+        # NULLs and ties on the order column, pks out of order with it
+        for i in range(17):
+            self.task(f'task {i}', assigned_to=users[i % 4] if i % 4 < 3 else None)
+
+        # created_at ties inside one millisecond
+        base = timezone.now().replace(microsecond=500000)
+        for i, pk in enumerate(Task.objects.order_by('-pk').values_list('pk', flat=True)):
+            Task.objects.filter(pk=pk).update(created_at=base + timedelta(microseconds=(i // 3) * 100))
+
+    def walk(self, order_by, per_page=4):
+        """pks of every page going forward, then of every page going back."""
+        forward, pages, cursor = [], 0, None
+        while True:
+            page = KeysetPage(Task.objects.all(), order_by, per_page, cursor=cursor)
+            forward += [t.pk for t in page]
+            pages += 1
+            self.assertLess(pages, 20, 'cursor does not advance')
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+
+        backward = [t.pk for t in page]
+        while page.previous_cursor:
+            page = KeysetPage(Task.objects.all(), order_by, per_page, cursor=page.previous_cursor)
+            backward = [t.pk for t in page] + backward
+        return forward, backward
+
+    def expected(self, order_by):
+        return list(Task.objects.order_by(F(order_by).asc(nulls_first=True), 'pk').values_list('pk', flat=True))
+
+    def test_nullable_fk_ordering(self):
+        forward, backward = self.walk('assigned_to')
+        self.assertEqual(forward, self.expected('assigned_to'))
+        self.assertEqual(backward, forward)
+
+    def test_datetime_ordering_keeps_microseconds(self):
+        forward, backward = self.walk('created_at')
+        self.assertEqual(forward, self.expected('created_at'))
+        self.assertEqual(backward, forward)
+
+    def test_pk_ordering(self):
+        forward, backward = self.walk('id', per_page=5)
+        self.assertEqual(forward, sorted(forward))
+        self.assertEqual(len(forward), 17)
+        self.assertEqual(backward, forward)
+
+    def test_bad_cursor_starts_over(self):
+        page = KeysetPage(Task.objects.all(), 'created_at', 4, cursor='not-a-cursor')
+        self.assertEqual([t.pk for t in page], self.expected('created_at')[:4])
+
+
+class ImportTests(DynDtTestCase):
+
+    def export_csv(self):
+        queryset, fields, fk_models = export_queryset({}, datatb_model('task'), 'task')
+        return ''.join(csv_chunks(queryset, fields, fk_models)).encode()
+
+    def test_export_imports_back(self):
+        self.task('one', cost=1, project=self.beta, assigned_to=User.objects.create(username='admin'))
+        self.task('two', cost=2, completed=True)
+
+        result = import_csv(Task, BytesIO(self.export_csv()))
+        self.assertEqual((result['created'], result['errors']), (2, []))
+        self.assertEqual(
+            list(Task.objects.order_by('pk').values_list('title', 'project__name', 'assigned_to__username',
+                                                         'completed'))[2:],
+            [('one', 'Beta', 'admin', False), ('two', 'Alpha', None, True)],
+        )
+
+    def test_fk_by_pk_label_and_ambiguous_label(self):
+        Project.objects.create(name='Twin', start_date=date(2025, 3, 1))
+        Project.objects.create(name='Twin', start_date=date(2025, 4, 1))
+        data = (f'project,title,time_taken,cost\n{self.beta.pk},by pk,0,0\nAlpha,by label,0,0\n'
+                f'Twin,ambiguous,0,0\nGamma,unknown,0,0\n')
+
+        result = import_csv(Task, BytesIO(data.encode()))
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([e['row'] for e in result['errors']], [4, 5])
+        self.assertEqual(dict(Task.objects.values_list('title', 'project')), {'by pk': self.beta.pk,
+                                                                              'by label': self.alpha.pk})
+
+    def test_missing_required_columns(self):
+        with self.assertRaisesMessage(CSVImportError, 'Missing required columns: project, time_taken'):
+            import_csv(Task, BytesIO(b'title,cost\nx,1\n'))
+
+    def test_unique_values_and_booleans(self):
+        User.objects.create(username='taken')
+        data = b'username,password,is_staff\nnew,x,yes\ntaken,x,no\nnew,x,on\nother,x,maybe\n'
+
+        result = import_csv(User, BytesIO(data))
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(sorted(e['row'] for e in result['errors']), [3, 4, 5])
+        self.assertTrue(User.objects.get(username='new').is_staff)
+
+
+class ExportJobTests(DynDtTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(user)
+        self.task('cheap', cost=1)
+        self.task('pricey', cost=100)
+
+    def queue(self):
+        response = self.client.post(reverse('export_job_create', args=['task']), {'format': 'csv'})
+        self.assertEqual(response.status_code, 202)
+        return ExportJob.objects.get(pk=response.json()['id'])
+
+    def run_job(self, job):
+        [claimed] = [j for j in jobs.claim(10) if j.pk == job.pk]
+        with mock.patch('apps.dyn_dt.export.table_config', side_effect=AssertionError('worker read its table config')):
+            jobs.run(claimed)
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.status, 'done', claimed.error)
+        with claimed.file.open('r') as f:
+            return f.read()
+
+    def test_job_uses_the_table_as_queued(self):
+        self.client.post(reverse('create_filter', args=['task']), {'key': 'cost', 'operator': 'gte', 'value': '50'})
+        self.client.post(reverse('create_hide_show_filter', args=['task']),
+                         {json.dumps({'key': 'description', 'value': True}): ''})
+        job = self.queue()
+
+        # changed after queueing: not part of this export
+        ModelFilter.objects.filter(parent='task').delete()
+
+        content = self.run_job(job)
+        self.assertIn('pricey', content)
+        self.assertNotIn('cheap', content)
+        self.assertNotIn('description', content.splitlines()[0])
+
+    def test_later_jobs_see_table_changes(self):
+        self.run_job(self.queue())
+        self.client.post(reverse('create_filter', args=['task']), {'key': 'cost', 'operator': 'lte', 'value': '50'})
+
+        content = self.run_job(self.queue())
+        self.assertIn('cheap', content)
+        self.assertNotIn('pricey', content)
+
+
+class QueryBudgetTests(DynDtTestCase):
+    """dyn_dt pages stay within DYNAMIC_DATATB_QUERY_BUDGET, whatever the number of rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        users = [User.objects.create(username=f'user{i}') for i in range(5)]
+        Task.objects.bulk_create([
+            Task(project=cls.alpha if i % 2 else cls.beta, assigned_to=users[i % 5], title=f'task {i}',
+                 time_taken=i, cost=i * 10)
+            for i in range(60)
+        ])
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def test_model_dt(self):
+        self.client.get(reverse('model_dt', args=['task']))  # seeds the column config
+        with query_budget():
+            response = self.client.get(reverse('model_dt', args=['task']))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'tpl;dur=(?!0\.0;)')
+
+    def test_model_dt_search_and_sort(self):
+        self.client.get(reverse('model_dt', args=['task']))
+        with query_budget():
+            response = self.client.get(reverse('model_dt', args=['task']), {'search': 'task', 'order_by': 'cost'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_model_dt_data(self):
+        params = {'draw': 1, 'start': 20, 'length': 25, 'search[value]': 'task',
+                  'order[0][column]': 0, 'order[0][dir]': 'desc'}
+        for i, name in enumerate(TASK_FIELDS):
+            params[f'columns[{i}][data]'] = name
+        self.client.get(reverse('model_dt_data', args=['task']), params)
+        with query_budget():
+            response = self.client.get(reverse('model_dt_data', args=['task']), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']), 25)
+
+    def test_budget_helper_fails_over_budget(self):
+        with self.assertRaisesMessage(AssertionError, 'budget is 1'):
+            with query_budget(1):
+                list(Task.objects.all())
+                list(Project.objects.all())
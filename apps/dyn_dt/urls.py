@@ -9,10 +9,21 @@ urlpatterns = [
     path('create-hide-show-items/<str:model_name>/', views.create_hide_show_filter, name="create_hide_show_filter"),
     path('delete-filter/<str:model_name>/<int:id>/', views.delete_filter, name="delete_filter"),
     path('create/<str:aPath>/', views.create, name="create"),
+    path('import/<str:aPath>/', views.import_rows, name="import_rows"),
     path('delete/<str:aPath>/<int:id>/', views.delete, name="delete"),
     path('update/<str:aPath>/<int:id>/', views.update, name="update"),
+    path('bulk-delete/<str:aPath>/', views.bulk_delete, name="bulk_delete"),
+    path('bulk-update/<str:aPath>/', views.bulk_update, name="bulk_update"),
 
     path('export-csv/<str:aPath>/', views.ExportCSVView.as_view(), name='export_csv'),
+    path('export-arrow/<str:aPath>/', views.ExportArrowView.as_view(), name='export_arrow'),
+    path('export-jobs/<str:aPath>/', views.export_job_create, name='export_job_create'),
+    path('export-job/<int:id>/', views.export_job, name='export_job'),
+    path('export-job/<int:id>/download/', views.export_job_download, name='export_job_download'),
+    path('datatables/<str:aPath>/', views.model_dt_data, name='model_dt_data'),
+    path('summary/<str:aPath>/', views.model_summary, name='model_summary'),
+    path('summary/<str:aPath>/<str:field>/', views.column_stats, name='column_stats'),
+    path('fk-lookup/<str:aPath>/<str:field>/', views.fk_lookup, name='fk_lookup'),
 
     path('dynamic-dt/<str:aPath>/', views.model_dt, name="model_dt"),
 ]
@@ -1,13 +1,329 @@
-from django.db.models import Q
+import json
+import time
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q, Avg, Count, Min, Max
+from django.utils import timezone
+
+from apps.dyn_dt.models import HideShowFilter, ModelFilter, PageItems
+from apps.dyn_dt import search
+
+# Cached per-model data is keyed on a version bumped on every write
+SUMMARY_TTL = 60 * 60
+# ...which a process-local cache (LocMemCache) does not share between
+# workers: there, cached data only lives a few seconds
+LOCAL_CACHE_TTL = 10
+
+
+def process_local_cache():
+    return isinstance(caches['default'], LocMemCache)
+
+
+def summary_ttl():
+    return LOCAL_CACHE_TTL if process_local_cache() else SUMMARY_TTL
 
 def user_filter(request, queryset, fields, fk_fields=[]):
     value = request.GET.get('search')
     
     if value:
-        dynamic_q = Q()
-        for field in fields:
-            if field not in fk_fields:
-                dynamic_q |= Q(**{f'{field}__icontains': value})
-        return queryset.filter(dynamic_q)
+        # ranked by relevance unless the user sorts
+        return search_queryset(queryset, value, fields, fk_fields, ranked='order_by' not in request.GET)
+
+    return queryset
+
+
+def _icontains(value, fields, fk_fields=[]):
+    dynamic_q = Q()
+    for field in fields:
+        if field not in fk_fields:
+            dynamic_q |= Q(**{f'{field}__icontains': value})
+    return dynamic_q
+
+
+def search_queryset(queryset, value, fields, fk_fields=[], ranked=True):
+    # Full-text index when the model has one
+    found = search.search(queryset, value, ranked=ranked)
+    if found is None:
+        return queryset.filter(_icontains(value, fields, fk_fields))
+
+    # the index only holds text columns: numbers, dates, ... keep icontains
+    others = _icontains(value, search.unindexed_fields(queryset.model, fields, value), fk_fields)
+    if not others:
+        return found
+    return queryset.filter(search.condition(queryset.model, value) | others)
+
+
+def _new_version():
+    # time based, so a version lost from the cache never restarts at a value already used
+    return time.time_ns()
+
+
+def _cache_version(key):
+    return cache.get_or_set(key, _new_version, None)
+
+
+def _bump_cache_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def model_cache_key(aModelClass, name):
+    version = _cache_version(f'dyn_dt:version:{aModelClass._meta.label_lower}')
+    return f'dyn_dt:{name}:{aModelClass._meta.label_lower}:{version}'
+
+
+def bump_model_cache_version(aModelClass):
+    _bump_cache_version(f'dyn_dt:version:{aModelClass._meta.label_lower}')
+
+
+# parent -> (version, config, loaded_at). The version lives in the shared
+# cache (see CACHES), so a write reaches every process. The config is
+# reloaded after TABLE_CONFIG_TTL seconds anyway, in case the cache is
+# process-local or lost the version.
+_table_configs = {}
+TABLE_CONFIG_TTL = 30
+
+DEFAULT_PAGE_ITEMS = 25
+
+
+def _table_config_key(parent):
+    return f'dyn_dt:config:{parent}'
+
+
+def bump_table_config_version(parent):
+    _bump_cache_version(_table_config_key(parent))
+
+
+def table_config(parent, db_fields):
+    """
+    Hide / show columns, filters and page size of a table, read once and
+    reused until one of the create_* / delete_filter views bumps its
+    version, or for TABLE_CONFIG_TTL seconds at most. Columns without a
+    HideShowFilter row are seeded in bulk.
+    """
+    version = _cache_version(_table_config_key(parent))
+    cached = _table_configs.get(parent)
+    if (cached and cached[0] == version and time.monotonic() - cached[2] < TABLE_CONFIG_TTL
+            and all(f in cached[1]['keys'] for f in db_fields)):
+        return cached[1]
+
+    columns = {c.key: c for c in HideShowFilter.objects.filter(parent=parent)}
+    missing = [HideShowFilter(parent=parent, key=f) for f in db_fields if f not in columns]
+    if missing:
+        HideShowFilter.objects.bulk_create(missing)
+        columns = {c.key: c for c in HideShowFilter.objects.filter(parent=parent)}
+
+    page_items = PageItems.objects.filter(parent=parent).last()
+
+    config = {
+        'keys': set(columns),
+        'columns': [columns[f] for f in db_fields],
+        'filters': list(ModelFilter.objects.filter(parent=parent)),
+        'page_items': page_items.items_per_page if page_items else DEFAULT_PAGE_ITEMS,
+    }
+    _table_configs[parent] = (version, config, time.monotonic())
+    return config
+
+
+# Substring operators work on the text of any column but cannot use an index
+TEXT_OPERATORS = ('icontains', 'startswith')
+
+def default_operator(field):
+    if isinstance(field, (models.CharField, models.TextField)):
+        return 'icontains'
+    return 'exact'
+
+
+TRUE_VALUES = ('1', 't', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'f', 'false', 'no', 'off')
+
+def _filter_value(field, raw):
+    if field.is_relation:
+        return field.target_field.to_python(raw)
+    if isinstance(field, models.BooleanField) and raw.lower() in TRUE_VALUES + FALSE_VALUES:
+        return raw.lower() in TRUE_VALUES
+    value = field.to_python(raw)
+    if isinstance(value, datetime) and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def filter_lookup(field, operator, value):
+    """
+    {lookup: value} of one filter, the value parsed with the field class
+    (int, date, bool, FK id...) so the database can compare natively.
+    Raises ValidationError when the value does not fit the field.
+    """
+    lookup = f'{field.name}__{operator}'
+
+    if operator == 'isnull':
+        return {lookup: value.strip().lower() in TRUE_VALUES}
+
+    if operator in TEXT_OPERATORS:
+        if field.is_relation:
+            raise ValidationError(f'{field.name}: "{operator}" does not apply to a foreign key')
+        return {lookup: value}
+
+    if operator in ('in', 'range'):
+        values = [_filter_value(field, v.strip()) for v in value.split(',')]
+        if operator == 'range' and len(values) != 2:
+            raise ValidationError(f'{field.name}: range expects "low,high"')
+        return {lookup: values}
+
+    if operator in ('exact', 'gt', 'gte', 'lt', 'lte'):
+        return {lookup: _filter_value(field, value.strip())}
+
+    raise ValidationError(f'Unknown operator: {operator}')
+
+
+def saved_filters(filters, fields):
+    """
+    Lookups of the saved ModelFilter rows of a table. Rows whose column
+    is gone or whose value no longer parses are left out.
+    """
+    lookups = {}
+    for filter_data in filters:
+        field = fields.get(filter_data.key)
+        if field is None:
+            continue
+        try:
+            lookups.update(filter_lookup(field, filter_data.operator, filter_data.value))
+        except ValidationError:
+            continue
+    return lookups
+
+
+NUMERIC_FIELDS = (models.IntegerField, models.FloatField, models.DecimalField)
+
+def column_summary(aModelClass):
+    """
+    Per-column non-null / null count, distinct count, min / max (and avg
+    for numbers), computed with a single aggregate query and cached until
+    the model is written.
+    """
+    key = model_cache_key(aModelClass, 'summary')
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+
+    aggregates = {'__total': Count('pk')}
+    for field in aModelClass._meta.fields:
+        column = field.attname  # FK -> <name>_id, no join
+        aggregates[f'{field.name}__count'] = Count(column)
+        aggregates[f'{field.name}__distinct'] = Count(column, distinct=True)
+        if 'password' in field.name:
+            continue
+        if not isinstance(field, (models.BooleanField, models.JSONField)):
+            aggregates[f'{field.name}__min'] = Min(column)
+            aggregates[f'{field.name}__max'] = Max(column)
+        if isinstance(field, NUMERIC_FIELDS) and not field.primary_key and not field.is_relation:
+            aggregates[f'{field.name}__avg'] = Avg(column)
+
+    values = aModelClass.objects.aggregate(**aggregates)
+
+    summary = {}
+    for field in aModelClass._meta.fields:
+        summary[field.name] = {
+            stat: values[f'{field.name}__{stat}']
+            for stat in ('count', 'distinct', 'min', 'max', 'avg')
+            if f'{field.name}__{stat}' in values
+        }
+        summary[field.name]['nulls'] = values['__total'] - values[f'{field.name}__count']
+
+    cache.set(key, summary, summary_ttl())
+    return summary
+
+
+# Top values are only listed for columns with at most this many distinct values
+TOP_VALUES_MAX_DISTINCT = 50
+TOP_VALUES = 10
+
+def has_top_values(field, distinct):
+    if 'password' in field.name:
+        return False
+    if field.choices or isinstance(field, models.BooleanField):
+        return True
+    return (isinstance(field, (models.CharField, models.TextField, models.ForeignKey))
+            and distinct <= TOP_VALUES_MAX_DISTINCT)
+
+
+def column_top_values(aModelClass, field, limit=TOP_VALUES):
+    """
+    Most frequent values of one low-cardinality column, with their row
+    count and display label, from one GROUP BY; None for other columns.
+    Cached like column_summary().
+    """
+    distinct = column_summary(aModelClass)[field.name]['distinct']
+    if not has_top_values(field, distinct):
+        return None
+
+    key = model_cache_key(aModelClass, f'top:{field.name}:{limit}')
+    top = cache.get(key)
+    if top is not None:
+        return top
+
+    rows = list(
+        aModelClass.objects.values(field.attname)
+        .annotate(n=Count('pk'))
+        .order_by('-n', field.attname)[:limit]
+    )
+
+    if field.is_relation:
+        ids = [row[field.attname] for row in rows if row[field.attname] is not None]
+        related = field.related_model._default_manager.in_bulk(ids)
+        labels = {pk: str(obj) for pk, obj in related.items()}
+    else:
+        labels = {value: str(label) for value, label in field.flatchoices}
+
+    top = []
+    for row in rows:
+        value = row[field.attname]
+        top.append({
+            'value': value,
+            'label': labels.get(value, '' if value is None else str(value)),
+            'count': row['n'],
+        })
+
+    cache.set(key, top, summary_ttl())
+    return top
+
+
+def table_rows(items, db_fields, fk_fields=[]):
+    """
+    Cells of the current page, computed once per row: the display values
+    of the table and, as JSON, the values the shared edit modal is filled
+    with (FKs as {"id", "text"} for select2, datetimes for datetime-local).
+    """
+    rows = []
+    for item in items:
+        cells = []
+        values = {}
+        for field in db_fields:
+            value = getattr(item, field, '')
+
+            if field in fk_fields:
+                values[field] = {'id': value.pk, 'text': str(value)} if value is not None else None
+            elif isinstance(value, datetime):
+                values[field] = value.strftime('%Y-%m-%dT%H:%M')
+                value = value.strftime('%Y-%m-%d %H:%M:%S')
+            elif isinstance(value, date):
+                values[field] = value.isoformat()
+            else:
+                values[field] = '' if value is None else str(value)
+
+            cells.append((field, value))
 
-    return queryset
\ No newline at end of file
+        rows.append({
+            'id': item.pk,
+            'cells': cells,
+            'data': json.dumps(values, cls=DjangoJSONEncoder),
+        })
+    return rows
@@ -1,8 +1,11 @@
-import requests, base64, json, csv
-from django.shortcuts import render, redirect, get_object_or_404
+import requests, base64, json, csv, hashlib
+from django.shortcuts import redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, FileResponse, Http404
+from django.utils.cache import patch_vary_headers
 from django.utils.safestring import mark_safe
 from django.conf import settings
 from django.urls import reverse
@@ -10,10 +13,21 @@ from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.urls import reverse
 from django.views import View
 from django.db import models
+from django.db.models import Q
+from django.core.exceptions import ValidationError
 from pprint import pp 
 
-from apps.dyn_dt.models import ModelFilter, PageItems, HideShowFilter
-from apps.dyn_dt.utils import user_filter
+from apps.dyn_dt.models import ModelFilter, PageItems, HideShowFilter, ExportJob
+from apps.dyn_dt.utils import (
+    user_filter, search_queryset, saved_filters, filter_lookup, default_operator, column_summary,
+    column_top_values, table_rows, table_config, bump_table_config_version, model_cache_key,
+    bump_model_cache_version, summary_ttl,
+)
+from apps.dyn_dt.pagination import KeysetPage
+from apps.dyn_dt.registry import datatb_model
+from apps.dyn_dt.importer import import_csv, clean_value, CSVImportError
+from apps.dyn_dt import search
+from apps.dyn_dt.export import export_queryset, table_snapshot, csv_chunks, gzip_chunks, arrow_chunks, has_pyarrow, ARROW_FORMATS
 
 from cli import *
 
@@ -27,22 +41,40 @@ def index(request):
         'segment': 'dynamic_dt'
     }
 
-    return render(request, 'dyn_dt/index.html', context)
+    return TemplateResponse(request, 'dyn_dt/index.html', context)
 
 def create_filter(request, model_name):
+    info = datatb_model(model_name)
     model_name = model_name.lower()
     if request.method == "POST":
+        if not info:
+            return HttpResponse( ' > ERR: Getting ModelClass for path: ' + model_name )
+
         keys = request.POST.getlist('key')
         values = request.POST.getlist('value')
-        for i in range(len(keys)):
-            key = keys[i]
-            value = values[i]
+        operators = request.POST.getlist('operator')
 
+        # validate every row before saving any
+        rows = []
+        for i in range(len(keys)):
+            field = info.fields.get(keys[i])
+            if field is None:
+                return HttpResponse( ' > ERR: Unknown field: ' + keys[i], status=400 )
+
+            operator = operators[i] if i < len(operators) and operators[i] else default_operator(field)
+            try:
+                filter_lookup(field, operator, values[i])
+            except ValidationError as e:
+                return HttpResponse( ' > ERR: Invalid filter: ' + ' '.join(e.messages), status=400 )
+            rows.append((keys[i], operator, values[i]))
+
+        for key, operator, value in rows:
             ModelFilter.objects.update_or_create(
                 parent=model_name,
                 key=key,
-                defaults={'value': value}
+                defaults={'operator': operator, 'value': value}
             )
+        bump_table_config_version(model_name)
 
         return redirect(reverse('model_dt', args=[model_name]))
 
@@ -55,6 +87,7 @@ def create_page_items(request, model_name):
             parent=model_name,
             defaults={'items_per_page':items}
         )
+        bump_table_config_version(model_name)
         return redirect(reverse('model_dt', args=[model_name]))
 
 
@@ -69,6 +102,7 @@ def create_hide_show_filter(request, model_name):
             key=data.get('key'),
             defaults={'value': data.get('value')}
         )
+        bump_table_config_version(model_name)
 
         response_data = {'message': 'Model updated successfully'}
         return JsonResponse(response_data)
@@ -80,134 +114,253 @@ def delete_filter(request, model_name, id):
     model_name = model_name.lower()
     filter_instance = ModelFilter.objects.get(id=id, parent=model_name)
     filter_instance.delete()
+    bump_table_config_version(model_name)
     return redirect(reverse('model_dt', args=[model_name]))
 
 
-def get_model_field_names(model, field_type):
-    """Returns a list of field names based on the given field type."""
-    return [
-        field.name for field in model._meta.get_fields() 
-        if isinstance(field, field_type)
-    ]
-
 def model_dt(request, aPath):
-    aModelName  = None
-    aModelClass = None
-    choices_dict = {}
+    info = datatb_model(aPath)
+    if not info:
+        return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
 
-    if aPath in settings.DYNAMIC_DATATB.keys():
-        aModelName  = settings.DYNAMIC_DATATB[aPath]
-        aModelClass = name_to_class(aModelName)
+    aModelClass = info.model
+    db_fields = info.db_fields
+    fk_fields = info.fk_fields
 
-    if not aModelClass:
-        return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
-    
-    #db_fields = [field.name for field in aModelClass._meta.get_fields() if not field.is_relation]
-    db_fields = [field.name for field in aModelClass._meta.fields]
-    fk_fields = get_model_fk_values(aModelClass)
-    db_filters = []
-    for f in db_fields:
-        if f not in fk_fields.keys():
-            db_filters.append( f )
-
-    for field in aModelClass._meta.fields:
-        if field.choices:
-            choices_dict[field.name] = field.choices
-
-    field_names = []
-    for field_name in db_fields:
-        fields, created = HideShowFilter.objects.get_or_create(key=field_name, parent=aPath.lower())
-        if fields.key in db_fields:
-            field_names.append(fields)
-    
-    model_series = {}
-    for f in db_fields:
-        f_values = list ( aModelClass.objects.values_list( f, flat=True) )
-        model_series[ f ] = ', '.join( str(i) for i in f_values)
+    config = table_config(aPath.lower(), db_fields)
+    field_names = config['columns']
 
     # model filter
-    filter_string = {}
-    filter_instance = ModelFilter.objects.filter(parent=aPath.lower())
-    for filter_data in filter_instance:
-        if filter_data.key in db_fields: 
-            filter_string[f'{filter_data.key}__icontains'] = filter_data.value
+    filter_instance = config['filters']
+    filter_string = saved_filters(filter_instance, info.fields)
 
     order_by = request.GET.get('order_by', 'id')
     if order_by not in db_fields:
         order_by = 'id'
     
-    queryset = aModelClass.objects.filter(**filter_string).order_by(order_by)
+    queryset = aModelClass.objects.filter(**filter_string).select_related(*fk_fields.keys()).order_by(order_by)
     item_list = user_filter(request, queryset, db_fields, fk_fields.keys())
 
     # pagination
-    page_items = PageItems.objects.filter(parent=aPath.lower()).last()
-    p_items = 25
-    if page_items:
-        p_items = page_items.items_per_page
-
-    page = request.GET.get('page', 1)
-    paginator = Paginator(item_list, p_items)
-
-    try:
-        items = paginator.page(page)
-    except PageNotAnInteger:
-        return redirect(reverse('model_dt', args=[aPath]))
-    except EmptyPage:
-        return redirect(reverse('model_dt', args=[aPath]))
+    p_items = config['page_items']
+
+    if info.options.get('pagination') == 'keyset':
+        filtered = bool(filter_string or request.GET.get('search'))
+        items = KeysetPage(item_list, order_by, p_items, request.GET.get('cursor'), filtered)
+    else:
+        page = request.GET.get('page', 1)
+        paginator = Paginator(item_list, p_items)
+
+        try:
+            items = paginator.page(page)
+        except PageNotAnInteger:
+            return redirect(reverse('model_dt', args=[aPath]))
+        except EmptyPage:
+            return redirect(reverse('model_dt', args=[aPath]))
     
     read_only_fields = ('id', )
 
-    integer_fields = get_model_field_names(aModelClass, models.IntegerField)
-    date_time_fields = get_model_field_names(aModelClass, models.DateTimeField)
-    email_fields = get_model_field_names(aModelClass, models.EmailField)
-    text_fields = get_model_field_names(aModelClass, (models.TextField, models.CharField))
-    
     context = {
         'page_title': 'Dynamic DataTable - ' + aPath.lower().title(),
+        'order_index': db_fields.index(order_by),
+        'dt_start': (items.number - 1) * p_items if hasattr(items, 'number') else 0,
         'link': aPath,
         'field_names': field_names,
         'db_field_names': db_fields,
-        'db_filters': db_filters,
+        'db_filters': info.db_filters,
         'items': items,
+        'rows': table_rows(items, db_fields, fk_fields),
         'page_items': p_items,
         'filter_instance': filter_instance,
+        'filter_operators': ModelFilter.OPERATORS,
         'read_only_fields': read_only_fields,
 
-        'integer_fields': integer_fields,
-        'date_time_fields': date_time_fields,
-        'email_fields': email_fields,
-        'text_fields': text_fields,
+        'integer_fields': info.integer_fields,
+        'date_time_fields': info.date_time_fields,
+        'email_fields': info.email_fields,
+        'text_fields': info.text_fields,
         'fk_fields_keys': list( fk_fields.keys() ),
-        'fk_fields': fk_fields ,
-        'choices_dict': choices_dict,
+        'choices_dict': info.choices,
         'parent': 'apps',
         'segment': 'dynamic_dt'
     }
-    return render(request, 'dyn_dt/model.html', context)
+    return TemplateResponse(request, 'dyn_dt/model.html', context)
+
+
+# Largest window model_dt_data returns (DataTables sends length=-1 for "all")
+DT_MAX_LENGTH = 500
+
+def model_dt_data(request, aPath):
+    """
+    DataTables server-side processing for a DYNAMIC_DATATB model:
+    reads draw / start / length / search / order / columns and returns
+    one window of rows with recordsTotal / recordsFiltered.
+    """
+    info = datatb_model(aPath)
+    if not info:
+        return JsonResponse({'error': 'Getting ModelClass for path: ' + aPath}, status=404)
 
+    aModelClass = info.model
+    db_fields = info.db_fields
+    fk_fields = info.fk_fields
+    config = table_config(aPath.lower(), db_fields)
+
+    try:
+        draw = int(request.GET.get('draw', 0))
+        start = max(int(request.GET.get('start', 0)), 0)
+        length = int(request.GET.get('length', config['page_items']))
+    except ValueError:
+        return JsonResponse({'error': 'draw, start and length must be integers'}, status=400)
+    if length <= 0 or length > DT_MAX_LENGTH:
+        length = DT_MAX_LENGTH
+
+    # saved filters, as in model_dt
+    filter_string = saved_filters(config['filters'], info.fields)
+    queryset = aModelClass.objects.filter(**filter_string)
+
+    # columns[i][data] names the field of column i (plain positions in db_fields without it)
+    columns = []
+    while f'columns[{len(columns)}][data]' in request.GET:
+        columns.append(request.GET[f'columns[{len(columns)}][data]'])
+    columns = columns or db_fields
+
+    ordering = []
+    i = 0
+    while f'order[{i}][column]' in request.GET:
+        try:
+            field = columns[int(request.GET[f'order[{i}][column]'])]
+        except (ValueError, IndexError):
+            field = None
+        if field in db_fields:
+            ordering.append(('-' if request.GET.get(f'order[{i}][dir]') == 'desc' else '') + field)
+        i += 1
+
+    filtered = queryset
+    searched = False
+    for i, field in enumerate(columns):
+        value = request.GET.get(f'columns[{i}][search][value]')
+        if value and field in db_fields and field not in fk_fields:
+            filtered = filtered.filter(**{f'{field}__icontains': value})
+            searched = True
+
+    value = request.GET.get('search[value]', '').strip()
+    if value:
+        searched = True
+        filtered = search_queryset(filtered, value, db_fields, fk_fields.keys(), ranked=not ordering)
+    if ordering or not value:
+        filtered = filtered.order_by(*ordering, 'pk')
+
+    # Unsearched total only changes on writes or filter edits
+    filters_hash = hashlib.md5(repr(sorted(filter_string.items())).encode()).hexdigest()
+    records_total = cache.get_or_set(model_cache_key(aModelClass, f'count:{filters_hash}'),
+                                     queryset.count, summary_ttl())
+    records_filtered = filtered.count() if searched else records_total
+
+    page = filtered.select_related(*fk_fields.keys())[start:start + length]
+    data = []
+    for row in table_rows(page, db_fields, fk_fields):
+        cells = {field: str(value) for field, value in row['cells']}
+        cells['DT_RowId'] = f'row-{row["id"]}'
+        cells['DT_RowClass'] = 'align-middle table-row'
+        cells['DT_RowAttr'] = {'data-id': row['id'], 'data-row': row['data']}
+        data.append(cells)
+
+    return JsonResponse({
+        'draw': draw,
+        'recordsTotal': records_total,
+        'recordsFiltered': records_filtered,
+        'data': data,
+    })
+
+
+FK_PAGE_SIZE = 20
 
 @login_required(login_url='/accounts/login/')
-def create(request, aPath):
-    aModelClass = None
+def fk_lookup(request, aPath, field):
+    """
+    Paginated options for one FK of a DYNAMIC_DATATB model, in the
+    select2 format: {"results": [{"id", "text"}], "pagination": {"more"}}.
+    """
+    info = datatb_model(aPath)
+    if not info:
+        return JsonResponse({'error': 'Getting ModelClass for path: ' + aPath}, status=404)
+
+    if field not in info.fk_models:
+        return JsonResponse({'error': f'{field} is not a foreign key of {aPath}'}, status=404)
+
+    related = info.fk_models[field]
+    queryset = related.objects.all()
+
+    term = request.GET.get('q', '').strip()
+    if term:
+        search_q = Q()
+        for f in related._meta.fields:
+            # never let the search probe credentials (e.g. User.password)
+            if isinstance(f, (models.CharField, models.TextField)) and 'password' not in f.name:
+                search_q |= Q(**{f'{f.name}__icontains': term})
+        if term.isdigit():
+            search_q |= Q(pk=term)
+        queryset = queryset.filter(search_q) if search_q else queryset.none()
+
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    # One row past the page tells whether there is more, without a COUNT(*)
+    start = (page - 1) * FK_PAGE_SIZE
+    rows = list(queryset.order_by('pk')[start:start + FK_PAGE_SIZE + 1])
+
+    return JsonResponse({
+        'results': [{'id': row.pk, 'text': str(row)} for row in rows[:FK_PAGE_SIZE]],
+        'pagination': {'more': len(rows) > FK_PAGE_SIZE},
+    })
+
+
+def model_summary(request, aPath):
+    info = datatb_model(aPath)
+    if not info:
+        return JsonResponse({'error': 'Getting ModelClass for path: ' + aPath}, status=404)
+
+    return JsonResponse(column_summary(info.model))
+
+
+def column_stats(request, aPath, field):
+    """
+    Statistics of one column plus its most frequent values ('top', null
+    for high-cardinality columns); feeds the filter value suggestions.
+    """
+    info = datatb_model(aPath)
+    if not info:
+        return JsonResponse({'error': 'Getting ModelClass for path: ' + aPath}, status=404)
+
+    if field not in info.fields:
+        return JsonResponse({'error': f'{field} is not a column of {aPath}'}, status=404)
+
+    stats = dict(column_summary(info.model)[field])
+    stats['top'] = column_top_values(info.model, info.fields[field])
+    return JsonResponse(stats)
 
-    if aPath in settings.DYNAMIC_DATATB.keys():
-        aModelName  = settings.DYNAMIC_DATATB[aPath]
-        aModelClass = name_to_class(aModelName)
 
-    if not aModelClass:
+@login_required(login_url='/accounts/login/')
+def create(request, aPath):
+    info = datatb_model(aPath)
+    if not info:
         return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
 
+    aModelClass = info.model
+
     if request.method == 'POST':
         data = {}
-        fk_fields = get_model_fk(aModelClass)
+        fk_models = info.fk_models
 
         for attribute, value in request.POST.items():
             if attribute == 'csrfmiddlewaretoken':
                 continue
 
             # Process FKs    
-            if attribute in fk_fields.keys():
-                value = name_to_class( fk_fields[attribute] ).objects.filter(id=value).first()
+            if attribute in fk_models:
+                value = fk_models[attribute].objects.filter(id=value).first()
             
             data[attribute] = value if value else ''
 
@@ -217,50 +370,129 @@ def create(request, aPath):
 
 
 @login_required(login_url='/accounts/login/')
-def delete(request, aPath, id):
-    aModelClass = None
+def import_rows(request, aPath):
+    """
+    Bulk insert the rows of an uploaded CSV ('file'). Answers with the
+    number of rows created and the row-level errors.
+    """
+    info = datatb_model(aPath)
+    if not info:
+        return JsonResponse({'error': 'Getting ModelClass for path: ' + aPath}, status=404)
+
+    if request.method != 'POST' or 'file' not in request.FILES:
+        return JsonResponse({'error': 'POST a CSV file as "file"'}, status=400)
 
-    if aPath in settings.DYNAMIC_DATATB.keys():
-        aModelName  = settings.DYNAMIC_DATATB[aPath]
-        aModelClass = name_to_class(aModelName)
+    try:
+        result = import_csv(info.model, request.FILES['file'])
+    except CSVImportError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
-    if not aModelClass:
+    return JsonResponse(result)
+
+
+@login_required(login_url='/accounts/login/')
+def delete(request, aPath, id):
+    info = datatb_model(aPath)
+    if not info:
         return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
     
-    item = aModelClass.objects.get(id=id)
+    item = info.model.objects.get(id=id)
     item.delete()
     return redirect(request.META.get('HTTP_REFERER'))
 
 
+def _selected_ids(request, aModelClass):
+    """pks posted as 'ids', or None when one of them is not a valid pk."""
+    try:
+        return [aModelClass._meta.pk.to_python(i) for i in request.POST.getlist('ids')]
+    except ValidationError:
+        return None
+
+
 @login_required(login_url='/accounts/login/')
-def update(request, aPath, id):
-    aModelClass = None
+def bulk_delete(request, aPath):
+    """Delete every posted id with one filtered delete()."""
+    info = datatb_model(aPath)
+    if not info:
+        return JsonResponse({'error': 'Getting ModelClass for path: ' + aPath}, status=404)
+
+    aModelClass = info.model
+    ids = _selected_ids(request, aModelClass)
+    if request.method != 'POST' or not ids:
+        return JsonResponse({'error': 'POST the rows to delete as "ids"'}, status=400)
 
-    if aPath in settings.DYNAMIC_DATATB.keys():
-        aModelName  = settings.DYNAMIC_DATATB[aPath]
-        aModelClass = name_to_class(aModelName)
+    deleted, _ = aModelClass.objects.filter(pk__in=ids).delete()
+    return JsonResponse({'deleted': deleted})
+
+
+@login_required(login_url='/accounts/login/')
+def bulk_update(request, aPath):
+    """
+    Set one field ('field' / 'value') on every posted id with a single
+    queryset.update(). The value is validated like an imported cell.
+    """
+    info = datatb_model(aPath)
+    if not info:
+        return JsonResponse({'error': 'Getting ModelClass for path: ' + aPath}, status=404)
+
+    aModelClass = info.model
+    ids = _selected_ids(request, aModelClass)
+    if request.method != 'POST' or not ids:
+        return JsonResponse({'error': 'POST the rows to update as "ids"'}, status=400)
+
+    field = info.editable.get(request.POST.get('field', ''))
+    if not field:
+        return JsonResponse({'error': 'Unknown or read-only field: ' + request.POST.get('field', '')}, status=400)
+
+    try:
+        value = clean_value(field, request.POST.get('value', '').strip())
+    except ValidationError as e:
+        return JsonResponse({'error': f'{field.name}: ' + ' '.join(e.messages)}, status=400)
 
-    if not aModelClass:
+    if field.is_relation and value is not None and not field.related_model._default_manager.filter(pk=value).exists():
+        return JsonResponse({'error': f'{field.related_model.__name__} {value} does not exist.'}, status=400)
+
+    queryset = aModelClass.objects.filter(pk__in=ids)
+    updated = queryset.update(**{field.attname: value})
+
+    # update() sends no signals
+    bump_model_cache_version(aModelClass)
+    if field.column in info.search_fields:
+        search.sync_instances(aModelClass, list(queryset))
+
+    return JsonResponse({'updated': updated})
+
+
+@login_required(login_url='/accounts/login/')
+def update(request, aPath, id):
+    info = datatb_model(aPath)
+    if not info:
         return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
 
-    item = aModelClass.objects.get(id=id)
-    fk_fields = get_model_fk(aModelClass)
+    item = info.model.objects.get(id=id)
+    fk_models = info.fk_models
 
     if request.method == 'POST':
+        db_fields = info.db_fields
+        changed = []
+
         for attribute, value in request.POST.items():
 
-            if attribute == 'csrfmiddlewaretoken':
+            if attribute == 'csrfmiddlewaretoken' or attribute not in db_fields:
                 continue
 
             if getattr(item, attribute, value) is not None:
 
                 # Process FKs    
-                if attribute in fk_fields.keys():
-                    value = name_to_class( fk_fields[attribute] ).objects.filter(id=value).first()
+                if attribute in fk_models:
+                    value = fk_models[attribute].objects.filter(id=value).first()
 
                 setattr(item, attribute, value)
+                changed.append(attribute)
         
-        item.save()
+        # only the posted columns
+        if changed:
+            item.save(update_fields=changed)
 
     return redirect(request.META.get('HTTP_REFERER'))
 
@@ -269,49 +501,98 @@ def update(request, aPath, id):
 # Export as CSV
 class ExportCSVView(View):
     def get(self, request, aPath):
-        aModelName  = None
-        aModelClass = None
+        info = datatb_model(aPath)
+        if not info:
+            return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
 
-        if aPath in settings.DYNAMIC_DATATB.keys():
-            aModelName  = settings.DYNAMIC_DATATB[aPath]
-            aModelClass = name_to_class(aModelName)
+        queryset, fields, fk_models = export_queryset(request.GET, info, aPath)
+        chunks = csv_chunks(queryset, fields, fk_models)
 
-        if not aModelClass:
-            return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
-        
-        db_field_names = [field.name for field in aModelClass._meta.get_fields()]
-        fields = []
-        show_fields = HideShowFilter.objects.filter(value=False, parent=aPath.lower())
-        
-        for field in show_fields:
-            if field.key in db_field_names:
-                fields.append(field.key)
-            else:
-                print(f"Field {field.key} does not exist in {aModelClass} model.")
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = StreamingHttpResponse(gzip_chunks(chunks), content_type='text/csv')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = StreamingHttpResponse(chunks, content_type='text/csv')
 
-        response = HttpResponse(content_type='text/csv')
+        patch_vary_headers(response, ('Accept-Encoding',))
         response['Content-Disposition'] = f'attachment; filename="{aPath.lower()}.csv"'
+        return response
+
+
+# Export as Parquet / Arrow
+class ExportArrowView(View):
+    def get(self, request, aPath):
+        info = datatb_model(aPath)
+        if not info:
+            return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
+
+        fmt = request.GET.get('format', 'parquet')
+        if fmt not in ARROW_FORMATS:
+            return HttpResponse(' > ERR: Unknown format: ' + fmt + ' (parquet, arrow)', status=400)
+        if not has_pyarrow():
+            return HttpResponse(' > ERR: pyarrow is not installed (pip install pyarrow)', status=501)
+
+        queryset, fields, fk_models = export_queryset(request.GET, info, aPath)
+        content_type, extension = ARROW_FORMATS[fmt]
+
+        response = StreamingHttpResponse(arrow_chunks(queryset, fields, fk_models, fmt), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{aPath.lower()}.{extension}"'
+        return response
+
+
+# Background exports (run by: python manage.py dyn_dt_export_worker)
+def _export_job_data(job):
+    data = {
+        'id': job.pk,
+        'status': job.status,
+        'format': job.format,
+        'rows_written': job.rows_written,
+        'total_rows': job.total_rows,
+        'progress': job.progress,
+        'error': job.error,
+        'status_url': reverse('export_job', args=[job.pk]),
+    }
+    if job.status == 'done':
+        data['download_url'] = reverse('export_job_download', args=[job.pk])
+    return data
+
 
-        writer = csv.writer(response)
-        writer.writerow(fields)  # Write the header
+def _user_export_job(request, id):
+    job = get_object_or_404(ExportJob, pk=id)
+    if job.created_by_id != request.user.pk and not request.user.is_staff:
+        raise Http404
+    return job
 
-        filter_string = {}
-        filter_instance = ModelFilter.objects.filter(parent=aPath.lower())
-        for filter_data in filter_instance:
-            filter_string[f'{filter_data.key}__icontains'] = filter_data.value
 
-        order_by = request.GET.get('order_by', 'id')
-        queryset = aModelClass.objects.filter(**filter_string).order_by(order_by)
+@login_required(login_url='/accounts/login/')
+def export_job_create(request, aPath):
+    """Queue an export ('format': csv / parquet) of the table as currently searched and sorted."""
+    info = datatb_model(aPath)
+    if not info:
+        return JsonResponse({'error': 'Getting ModelClass for path: ' + aPath}, status=404)
 
-        items = user_filter(request, queryset, db_field_names)
+    fmt = request.POST.get('format', 'csv')
+    if request.method != 'POST' or fmt not in dict(ExportJob.FORMATS):
+        return JsonResponse({'error': 'POST a format: csv, parquet'}, status=400)
 
-        for item in items:
-            row_data = []
-            for field in fields:
-                try:
-                    row_data.append(getattr(item, field))
-                except AttributeError:
-                    row_data.append('') 
-            writer.writerow(row_data)
+    params = {key: request.POST[key] for key in ('search', 'order_by') if request.POST.get(key)}
+    params['table'] = table_snapshot(info, aPath)
+    job = ExportJob.objects.create(parent=aPath, format=fmt, params=params, created_by=request.user)
+    return JsonResponse(_export_job_data(job), status=202)
 
-        return response
\ No newline at end of file
+
+@login_required(login_url='/accounts/login/')
+def export_job(request, id):
+    return JsonResponse(_export_job_data(_user_export_job(request, id)))
+
+
+@login_required(login_url='/accounts/login/')
+def export_job_download(request, id):
+    job = _user_export_job(request, id)
+    if job.status != 'done' or not job.file:
+        raise Http404
+    try:
+        handle = job.file.open('rb')
+    except FileNotFoundError:
+        raise Http404
+    return FileResponse(handle, as_attachment=True, filename=job.file.name.rsplit('/', 1)[-1])
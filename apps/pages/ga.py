@@ -6,16 +6,18 @@ GA4 Data helpers for Django views.
     GOOGLE_APPLICATION_CREDENTIALS=/abs/path/to/ga4.json
   or
     GOOGLE_APPLICATION_CREDENTIALS_JSON='{"type":"service_account", ...}'
+  or runs offline against a stand-in client:
+    GA4_CLIENT_BACKEND=apps.pages.ga_fake.FakeAnalyticsDataClient
 
 - Exposes convenience functions used by the analytics page:
     get_nonzero_overview_7d()
-    get_timeseries_30d()
-    get_devices_7d()
-    get_countries_7d(limit=10)
     get_top_pages_7d(limit=10)
     get_sources_7d(limit=10)
     get_realtime_active()
 
+Daily series and device / country breakdowns are served from the local
+warehouse instead (see apps/pages/warehouse.py).
+
 All functions are defensive: on errors they return empty values
 instead of exploding your page.
 """
@@ -24,6 +26,10 @@ from __future__ import annotations
 
 import os
 import json
+import importlib
+import random
+import threading
+import time
 from typing import List, Dict, Any
 
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
@@ -34,17 +40,49 @@ from google.analytics.data_v1beta.types import (
     RunReportRequest,
     RunRealtimeReportRequest,
 )
-from google.api_core.exceptions import GoogleAPICallError, PermissionDenied, NotFound
+from google.api_core.exceptions import (
+    GoogleAPICallError, PermissionDenied, NotFound,
+    ServiceUnavailable, DeadlineExceeded, InternalServerError, Aborted, ResourceExhausted,
+)
 from google.oauth2 import service_account
 
+from . import ga_metrics
+
 # -----------------------
 # Configuration
 # -----------------------
 PROPERTY_ID = os.getenv("GA4_PROPERTY_ID", "")
 
+# Dotted path to a client class used instead of BetaAnalyticsDataClient,
+# e.g. apps.pages.ga_fake.FakeAnalyticsDataClient for offline runs
+CLIENT_BACKEND = os.getenv("GA4_CLIENT_BACKEND", "")
+
+# Per-attempt timeout and total budget for one GA call (seconds)
+CALL_TIMEOUT  = float(os.getenv("GA4_CALL_TIMEOUT", "5"))
+CALL_DEADLINE = float(os.getenv("GA4_CALL_DEADLINE", "12"))
+
+# Retries for transient gRPC codes, full-jitter exponential backoff
+MAX_RETRIES = int(os.getenv("GA4_MAX_RETRIES", "2"))
+RETRY_BASE  = float(os.getenv("GA4_RETRY_BASE", "0.3"))
+RETRY_CAP   = float(os.getenv("GA4_RETRY_CAP", "3"))
+
+# Circuit breaker: open after N consecutive failures, retry after cool-down
+BREAKER_THRESHOLD = int(os.getenv("GA4_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN  = float(os.getenv("GA4_BREAKER_COOLDOWN", "60"))
+
+RETRYABLE_ERRORS = (ServiceUnavailable, DeadlineExceeded, InternalServerError, Aborted)
+# Errors meaning "GA is unavailable" (vs. a bad request): they trip the breaker
+TRANSIENT_ERRORS = RETRYABLE_ERRORS + (ResourceExhausted,)
+
 # Cache the GA client instance
 _GA_CLIENT: BetaAnalyticsDataClient | None = None
 
+# Last successful result per call key, served while GA is failing
+_LAST_GOOD: Dict[str, Any] = {}
+
+# Per-thread count of calls answered with a fallback (see fallback_count)
+_FALLBACKS = threading.local()
+
 
 def _fmt_secs_to_hms(sec: Any) -> str:
     """Format seconds to H:MM:SS."""
@@ -98,28 +136,173 @@ def _make_credentials():
 
 def get_client() -> BetaAnalyticsDataClient:
     """
-    Return a singleton GA Data API client using explicit credentials.
+    Return a singleton GA Data API client using explicit credentials,
+    or an instance of CLIENT_BACKEND when one is configured.
     """
     global _GA_CLIENT
     if _GA_CLIENT is None:
-        creds = _make_credentials()
-        _GA_CLIENT = BetaAnalyticsDataClient(credentials=creds)
+        if CLIENT_BACKEND:
+            module_name, cls_name = CLIENT_BACKEND.rsplit(".", 1)
+            _GA_CLIENT = getattr(importlib.import_module(module_name), cls_name)()
+        else:
+            creds = _make_credentials()
+            _GA_CLIENT = BetaAnalyticsDataClient(credentials=creds)
     return _GA_CLIENT
 
 
-def _safe_run(callable_fn, fallback):
+def set_client(client) -> None:
+    """
+    Replace the cached client (tests / benchmarks). None resets it.
+    """
+    global _GA_CLIENT
+    _GA_CLIENT = client
+
+
+class CircuitBreaker:
+    """
+    Process-wide breaker shared by every GA call.
+
+    closed    -> calls go through, consecutive failures are counted
+    open      -> calls are skipped until `cooldown` seconds have passed
+    half-open -> a single trial call decides between closed and open
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.threshold:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial:
+                self.trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.trial = False
+
+    def release(self):
+        """End a trial call whatever its outcome, so the next one can start."""
+        with self._lock:
+            self.trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+BREAKER = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+
+
+def _call_with_retries(method, req):
+    """
+    Call a client method with a per-attempt timeout, retrying transient
+    errors with jittered backoff until MAX_RETRIES or CALL_DEADLINE.
+    Latency, errors and the returned property quota are recorded.
+    """
+    report = ga_metrics.report_name(req)
+    req.return_property_quota = True
+
+    started = time.monotonic()
+    deadline = started + CALL_DEADLINE
+    attempt = 0
+    while True:
+        timeout = min(CALL_TIMEOUT, max(deadline - time.monotonic(), 0.1))
+        try:
+            # retry=None: the client's own retry policy would ignore our deadline
+            res = method(req, timeout=timeout, retry=None)
+            break
+        except RETRYABLE_ERRORS:
+            attempt += 1
+            delay = random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2 ** attempt))
+            if attempt > MAX_RETRIES or time.monotonic() + delay >= deadline:
+                ga_metrics.record_call(report, time.monotonic() - started, error=True)
+                raise
+            ga_metrics.record_retry(report)
+            time.sleep(delay)
+        except Exception:
+            ga_metrics.record_call(report, time.monotonic() - started, error=True)
+            raise
+
+    ga_metrics.record_call(report, time.monotonic() - started)
+    if "property_quota" in res:
+        ga_metrics.record_quota(res.property_quota)
+    return res
+
+
+def _run_report(req: RunReportRequest):
+    return _call_with_retries(get_client().run_report, req)
+
+
+def _run_realtime_report(req: RunRealtimeReportRequest):
+    return _call_with_retries(get_client().run_realtime_report, req)
+
+
+def fallback_count() -> int:
+    """
+    Calls of the current thread answered with a fallback or last good
+    result. Compare before / after a loader to tell whether it got live data.
+    """
+    return getattr(_FALLBACKS, "count", 0)
+
+
+def _fallback(value):
+    _FALLBACKS.count = fallback_count() + 1
+    return value
+
+
+def _safe_run(callable_fn, fallback, key: str = ""):
     """
     Execute a GA call and return fallback on any handled error.
+
+    While the breaker is open the call is skipped. When `key` is given,
+    the last successful result is returned instead of `fallback`.
     """
+    if not BREAKER.allow():
+        ga_metrics.record_short_circuit()
+        return _fallback(_LAST_GOOD.get(key, fallback))
+
     try:
-        return callable_fn()
+        result = callable_fn()
+    except TRANSIENT_ERRORS as e:
+        BREAKER.record_failure()
+        print(f"[GA4] Unavailable ({BREAKER.state}): {e}")
+        return _fallback(_LAST_GOOD.get(key, fallback))
     except (GoogleAPICallError, PermissionDenied, NotFound, RuntimeError) as e:
         # Optional: log for debugging in server logs
         print(f"[GA4] Error: {e}")
-        return fallback
+        return _fallback(fallback)
     except Exception as e:
         print(f"[GA4] Unknown error: {e}")
-        return fallback
+        return _fallback(fallback)
+    finally:
+        # a half-open trial ends with any outcome, not only success / transient failure
+        BREAKER.release()
+
+    BREAKER.record_success()
+    if key:
+        _LAST_GOOD[key] = result
+    return result
 
 
 # -----------------------
@@ -135,10 +318,10 @@ def get_realtime_active() -> int:
             property=f"properties/{PROPERTY_ID}",
             metrics=[Metric(name="activeUsers")],
         )
-        res = get_client().run_realtime_report(req)
+        res = _run_realtime_report(req)
         return _to_int(res.rows[0].metric_values[0].value) if res.rows else 0
 
-    return _safe_run(_call, 0)
+    return _safe_run(_call, 0, key="realtime")
 
 
 def get_nonzero_overview_7d() -> List[Dict[str, Any]]:
@@ -170,10 +353,9 @@ def get_nonzero_overview_7d() -> List[Dict[str, Any]]:
                 metrics=[Metric(name=m) for m in metric_names],
                 date_ranges=[DateRange(start_date="7daysAgo", end_date="today")],
             )
-            res = get_client().run_report(req)
-            return res
+            return _run_report(req)
 
-        res = _safe_run(_call, None)
+        res = _safe_run(_call, None, key="overview:" + ",".join(metric_names))
         if not res:
             continue
 
@@ -210,87 +392,6 @@ def get_nonzero_overview_7d() -> List[Dict[str, Any]]:
     return []
 
 
-def get_timeseries_30d() -> List[Dict[str, Any]]:
-    """
-    Line series: sessions & activeUsers by date for last 30 days.
-    """
-    if not PROPERTY_ID:
-        return []
-
-    def _call():
-        req = RunReportRequest(
-            property=f"properties/{PROPERTY_ID}",
-            dimensions=[Dimension(name="date")],
-            metrics=[Metric(name="sessions"), Metric(name="activeUsers")],
-            date_ranges=[DateRange(start_date="30daysAgo", end_date="today")],
-        )
-        return get_client().run_report(req)
-
-    res = _safe_run(_call, None)
-    if not res or not res.rows:
-        return []
-
-    out: List[Dict[str, Any]] = []
-    for r in res.rows:
-        d = r.dimension_values[0].value  # YYYYMMDD
-        out.append({
-            "date": f"{d[0:4]}-{d[4:6]}-{d[6:8]}",
-            "sessions": _to_int(r.metric_values[0].value),
-            "activeUsers": _to_int(r.metric_values[1].value),
-        })
-    return out
-
-
-def get_devices_7d() -> List[Dict[str, Any]]:
-    """
-    Doughnut: sessions by deviceCategory (7d).
-    """
-    if not PROPERTY_ID:
-        return []
-
-    def _call():
-        req = RunReportRequest(
-            property=f"properties/{PROPERTY_ID}",
-            dimensions=[Dimension(name="deviceCategory")],
-            metrics=[Metric(name="sessions")],
-            date_ranges=[DateRange(start_date="28daysAgo", end_date="today")],
-        )
-        return get_client().run_report(req)
-
-    res = _safe_run(_call, None)
-    if not res or not res.rows:
-        return []
-
-    return [{"label": r.dimension_values[0].value,
-             "value": _to_int(r.metric_values[0].value)} for r in res.rows]
-
-
-def get_countries_7d(limit: int = 10) -> List[Dict[str, Any]]:
-    """
-    Bar: sessions by country (7d).
-    """
-    if not PROPERTY_ID:
-        return []
-
-    def _call():
-        req = RunReportRequest(
-            property=f"properties/{PROPERTY_ID}",
-            dimensions=[Dimension(name="country")],
-            metrics=[Metric(name="sessions")],
-            date_ranges=[DateRange(start_date="7daysAgo", end_date="today")],
-            limit=limit,
-            order_bys=[{"desc": True, "metric": {"metric_name": "sessions"}}],
-        )
-        return get_client().run_report(req)
-
-    res = _safe_run(_call, None)
-    if not res or not res.rows:
-        return []
-
-    return [{"label": r.dimension_values[0].value,
-             "value": _to_int(r.metric_values[0].value)} for r in res.rows]
-
-
 def get_top_pages_7d(limit: int = 10) -> List[Dict[str, Any]]:
     """
     Table: top pages by views (7d).
@@ -310,9 +411,9 @@ def get_top_pages_7d(limit: int = 10) -> List[Dict[str, Any]]:
             limit=limit,
             order_bys=[{"desc": True, "metric": {"metric_name": "screenPageViews"}}],
         )
-        return get_client().run_report(req)
+        return _run_report(req)
 
-    res = _safe_run(_call, None)
+    res = _safe_run(_call, None, key=f"top_pages:{limit}")
     if not res or not res.rows:
         return []
 
@@ -343,9 +444,9 @@ def get_sources_7d(limit: int = 10) -> List[Dict[str, Any]]:
             limit=limit,
             order_bys=[{"desc": True, "metric": {"metric_name": "sessions"}}],
         )
-        return get_client().run_report(req)
+        return _run_report(req)
 
-    res = _safe_run(_call, None)
+    res = _safe_run(_call, None, key=f"sources:{limit}")
     if not res or not res.rows:
         return []
 
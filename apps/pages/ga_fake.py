@@ -0,0 +1,254 @@
+# apps/pages/ga_fake.py
+"""
+Offline stand-ins for BetaAnalyticsDataClient.
+
+Select one with GA4_CLIENT_BACKEND (see apps/pages/ga.py):
+
+    FakeAnalyticsDataClient
+        Replays RunReportResponse / RunRealtimeReportResponse fixtures
+        recorded as JSON. Requests without a fixture get deterministic
+        synthetic rows, so every helper works without credentials.
+
+    RecordingAnalyticsDataClient
+        Talks to the real API and saves each response as a fixture.
+
+Environment:
+    GA4_FAKE_FIXTURES    fixture directory (default: apps/pages/ga_fixtures)
+    GA4_FAKE_LATENCY_MS  added latency per call, "80" or a "20-300" range
+    GA4_FAKE_ERROR_RATE  share of calls failing with 503 (0..1)
+    GA4_FAKE_SEED        seed for latency / errors / synthetic values
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, List, Optional, Tuple
+
+from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from google.analytics.data_v1beta.types import (
+    DimensionHeader,
+    DimensionValue,
+    MetricHeader,
+    MetricValue,
+    PropertyQuota,
+    QuotaStatus,
+    Row,
+    RunReportResponse,
+    RunRealtimeReportResponse,
+)
+from google.api_core.exceptions import DeadlineExceeded, ServiceUnavailable
+
+FIXTURES_DIR = os.getenv(
+    "GA4_FAKE_FIXTURES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ga_fixtures")
+)
+
+# Value pools for synthetic rows
+DIMENSION_VALUES = {
+    "deviceCategory": ["desktop", "mobile", "tablet"],
+    "country": ["United States", "India", "Germany", "United Kingdom", "Brazil",
+                "France", "Canada", "Japan", "Australia", "Spain"],
+    "pageTitle": ["Home", "Dashboard", "Analytics", "Projects", "Profile",
+                  "Kanban", "Campaigns", "Assets", "Configuration", "Login"],
+    "pagePathPlusQueryString": ["/", "/dashboard/", "/analytics/", "/projects/", "/profile/",
+                                "/task_management/", "/campaigns/", "/assets/", "/configuration/", "/login/"],
+    "sessionSource": ["google", "(direct)", "bing", "newsletter", "github",
+                      "twitter.com", "linkedin.com", "duckduckgo", "reddit.com", "facebook.com"],
+    "sessionMedium": ["organic", "(none)", "organic", "email", "referral",
+                      "social", "social", "organic", "referral", "social"],
+}
+RATE_METRICS = ("engagementRate", "bounceRate")
+
+# Simulated property quota (standard GA4 property limits)
+TOKENS_PER_DAY = 200000
+TOKENS_PER_HOUR = 40000
+CONCURRENT_REQUESTS = 10
+SECONDS_METRICS = ("averageSessionDuration", "userEngagementDuration")
+
+
+def _parse_latency(raw: str) -> Tuple[float, float]:
+    if not raw:
+        return 0.0, 0.0
+    low, _, high = raw.partition("-")
+    return float(low) / 1000.0, float(high or low) / 1000.0
+
+
+def _resolve_date(raw: str, today: date) -> date:
+    """GA4 relative dates: today, yesterday, NdaysAgo, YYYY-MM-DD."""
+    if raw == "today":
+        return today
+    if raw == "yesterday":
+        return today - timedelta(days=1)
+    if raw.endswith("daysAgo"):
+        return today - timedelta(days=int(raw[:-len("daysAgo")]))
+    return date.fromisoformat(raw)
+
+
+def fixture_name(kind: str, request) -> str:
+    """
+    File name of the fixture answering `request`: report kind plus
+    dimension and metric names (date ranges are not part of the key).
+    """
+    dims = "-".join(d.name for d in request.dimensions) or "none"
+    metrics = "-".join(m.name for m in request.metrics)
+    return f"{kind}__{dims}__{metrics}.json"
+
+
+class FakeAnalyticsDataClient:
+    """
+    Implements the two client methods used by apps.pages.ga.
+    `calls` counts requests per method, for benchmarks.
+    """
+
+    def __init__(self, fixtures_dir: str = "", latency_ms: Optional[str] = None,
+                 error_rate: Optional[float] = None, seed: Optional[int] = None):
+        self.fixtures_dir = fixtures_dir or FIXTURES_DIR
+        self.latency = _parse_latency(latency_ms if latency_ms is not None
+                                      else os.getenv("GA4_FAKE_LATENCY_MS", ""))
+        self.error_rate = error_rate if error_rate is not None \
+            else float(os.getenv("GA4_FAKE_ERROR_RATE", "0"))
+        self.seed = seed if seed is not None else int(os.getenv("GA4_FAKE_SEED", "0"))
+        self.calls: Counter = Counter()
+        self.tokens_used = 0
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    # -----------------------
+    # Client API
+    # -----------------------
+
+    def run_report(self, request, timeout: Optional[float] = None, **kwargs) -> RunReportResponse:
+        self._simulate("run_report", timeout)
+        return self._respond("report", request, RunReportResponse)
+
+    def run_realtime_report(self, request, timeout: Optional[float] = None, **kwargs) -> RunRealtimeReportResponse:
+        self._simulate("run_realtime_report", timeout)
+        return self._respond("realtime", request, RunRealtimeReportResponse)
+
+    # -----------------------
+    # Internals
+    # -----------------------
+
+    def _simulate(self, method: str, timeout: Optional[float]):
+        """Apply configured latency / errors; honour the caller's timeout."""
+        with self._lock:
+            self.calls[method] += 1
+            delay = self._rng.uniform(*self.latency)
+            fail = self._rng.random() < self.error_rate
+
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise DeadlineExceeded(f"fake {method}: {delay:.3f}s exceeds timeout {timeout:.3f}s")
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise ServiceUnavailable(f"fake {method}: injected error")
+
+    def _respond(self, kind: str, request, response_cls):
+        """Recorded fixture when there is one, synthetic rows otherwise."""
+        path = os.path.join(self.fixtures_dir, fixture_name(kind, request))
+        if not os.path.exists(path):
+            return self._synthesize(request, response_cls)
+        with open(path, encoding="utf-8") as f:
+            return response_cls.from_json(f.read(), ignore_unknown_fields=True)
+
+    def _synthesize(self, request, response_cls):
+        dim_names = [d.name for d in request.dimensions]
+        metric_names = [m.name for m in request.metrics]
+
+        # Date dimension: one row per day of the requested range
+        dates: List[Optional[str]] = [None]
+        if "date" in dim_names and getattr(request, "date_ranges", None):
+            today = date.today()
+            rng = request.date_ranges[0]
+            start, end = _resolve_date(rng.start_date, today), _resolve_date(rng.end_date, today)
+            dates = [(start + timedelta(days=i)).strftime("%Y%m%d") for i in range((end - start).days + 1)]
+
+        # Other dimensions: walk their value pools in parallel
+        pools = {n: DIMENSION_VALUES.get(n, [f"({n})"]) for n in dim_names if n != "date"}
+        width = max([len(p) for p in pools.values()] or [1])
+
+        rows = []
+        for day in dates:
+            for i in range(width):
+                values = {n: pool[i % len(pool)] for n, pool in pools.items()}
+                if day:
+                    values["date"] = day
+                dims = [values[n] for n in dim_names]
+                rows.append(Row(
+                    dimension_values=[DimensionValue(value=v) for v in dims],
+                    metric_values=[MetricValue(value=self._metric_value(m, dims, i)) for m in metric_names],
+                ))
+
+        if getattr(request, "order_bys", None) and metric_names:
+            rows.sort(key=lambda r: float(r.metric_values[0].value), reverse=True)
+        if getattr(request, "limit", 0):
+            rows = rows[:request.limit]
+
+        res = response_cls(
+            dimension_headers=[DimensionHeader(name=n) for n in dim_names],
+            metric_headers=[MetricHeader(name=n) for n in metric_names],
+            rows=rows,
+            row_count=len(rows),
+        )
+        if getattr(request, "return_property_quota", False):
+            res.property_quota = self._quota(len(dim_names) + len(metric_names) + len(rows) // 100)
+        return res
+
+    def _quota(self, cost: int) -> PropertyQuota:
+        """Charge `cost` tokens; hourly usage is approximated by daily usage."""
+        with self._lock:
+            self.tokens_used += cost
+            used = self.tokens_used
+        return PropertyQuota(
+            tokens_per_day=QuotaStatus(consumed=cost, remaining=max(TOKENS_PER_DAY - used, 0)),
+            tokens_per_hour=QuotaStatus(consumed=cost, remaining=max(TOKENS_PER_HOUR - used, 0)),
+            concurrent_requests=QuotaStatus(consumed=0, remaining=CONCURRENT_REQUESTS),
+        )
+
+    def _metric_value(self, metric: str, dims: List[str], rank: int) -> str:
+        # Stable per (seed, metric, dimension values); earlier pool entries get more traffic
+        rnd = random.Random(zlib.crc32(f"{self.seed}|{metric}|{'|'.join(dims)}".encode()))
+        if metric in RATE_METRICS:
+            return f"{rnd.uniform(0.2, 0.8):.4f}"
+        if metric in SECONDS_METRICS:
+            return f"{rnd.uniform(30, 600):.2f}"
+        if metric == "sessionsPerUser":
+            return f"{rnd.uniform(1.0, 2.5):.2f}"
+        if metric == "totalRevenue":
+            return f"{rnd.uniform(0, 500):.2f}"
+        return str(int(rnd.randint(20, 400) / (rank + 1)))
+
+
+class RecordingAnalyticsDataClient:
+    """
+    Real client that also writes every response as a fixture for
+    FakeAnalyticsDataClient. Credentials as for apps.pages.ga.
+    """
+
+    def __init__(self, fixtures_dir: str = ""):
+        from .ga import _make_credentials
+
+        self.fixtures_dir = fixtures_dir or FIXTURES_DIR
+        self._client = BetaAnalyticsDataClient(credentials=_make_credentials())
+
+    def run_report(self, request, **kwargs) -> RunReportResponse:
+        res = self._client.run_report(request, **kwargs)
+        self._save("report", request, res)
+        return res
+
+    def run_realtime_report(self, request, **kwargs) -> RunRealtimeReportResponse:
+        res = self._client.run_realtime_report(request, **kwargs)
+        self._save("realtime", request, res)
+        return res
+
+    def _save(self, kind: str, request, response: Any):
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        path = os.path.join(self.fixtures_dir, fixture_name(kind, request))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(type(response).to_json(response))
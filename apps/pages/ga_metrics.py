@@ -0,0 +1,179 @@
+# apps/pages/ga_metrics.py
+"""
+In-process counters for GA4 usage.
+
+Recorded by apps.pages.ga / apps.pages.views:
+    - calls, errors, retries and latency per report
+    - last property quota returned by GA (return_property_quota=True)
+    - widget cache hits / misses
+    - calls skipped by the circuit breaker
+
+Read with `snapshot()` (status page) or `render_prometheus()` (scrapers).
+Values are per process: with several gunicorn workers each one reports
+its own numbers.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# Warn when less than this share of a quota bucket is left
+QUOTA_WARN_RATIO = float(os.getenv("GA4_QUOTA_WARN_RATIO", "0.2"))
+
+QUOTA_FIELDS = (
+    "tokens_per_day",
+    "tokens_per_hour",
+    "tokens_per_project_per_hour",
+    "concurrent_requests",
+    "server_errors_per_project_per_hour",
+    "potentially_thresholded_requests_per_hour",
+)
+
+_lock = threading.Lock()
+_started_at = time.time()
+
+_reports: Dict[str, Dict[str, float]] = defaultdict(
+    lambda: {"calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+)
+_cache: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+_quota: Dict[str, Dict[str, int]] = {}
+_quota_at: float = 0.0
+_short_circuits = 0
+
+
+def report_name(request) -> str:
+    """
+    Stable label for a request: realtime, or its dimensions joined by '+'
+    ('totals' without dimensions).
+    """
+    if type(request).__name__ == "RunRealtimeReportRequest":
+        return "realtime"
+    return "+".join(d.name for d in request.dimensions) or "totals"
+
+
+def record_call(report: str, elapsed: float, error: bool = False):
+    ms = elapsed * 1000.0
+    with _lock:
+        stats = _reports[report]
+        stats["calls"] += 1
+        stats["errors"] += int(error)
+        stats["total_ms"] += ms
+        stats["last_ms"] = ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+
+
+def record_retry(report: str):
+    with _lock:
+        _reports[report]["retries"] += 1
+
+
+def record_quota(quota):
+    """Store the PropertyQuota of a response and warn on low buckets."""
+    global _quota_at
+    values = {}
+    for name in QUOTA_FIELDS:
+        status = getattr(quota, name, None)
+        if status is None or not (status.consumed or status.remaining):
+            continue
+        values[name] = {"consumed": status.consumed, "remaining": status.remaining}
+
+    if not values:
+        return
+
+    with _lock:
+        _quota.clear()
+        _quota.update(values)
+        _quota_at = time.time()
+
+    for name, status in values.items():
+        if _is_low(status):
+            print(f"[GA4] Quota low: {name} remaining={status['remaining']} (consumed {status['consumed']})")
+
+
+def record_cache(name: str, hit: bool):
+    with _lock:
+        _cache[name]["hits" if hit else "misses"] += 1
+
+
+def record_short_circuit():
+    global _short_circuits
+    with _lock:
+        _short_circuits += 1
+
+
+def _is_low(status: Dict[str, int]) -> bool:
+    total = status["consumed"] + status["remaining"]
+    return bool(total) and status["remaining"] < total * QUOTA_WARN_RATIO
+
+
+def snapshot() -> Dict[str, Any]:
+    """Copy of every counter, with averages and hit ratios computed."""
+    with _lock:
+        reports = {}
+        for name, s in sorted(_reports.items()):
+            reports[name] = {**s, "avg_ms": s["total_ms"] / s["calls"] if s["calls"] else 0.0}
+
+        cache = {}
+        for name, c in sorted(_cache.items()):
+            total = c["hits"] + c["misses"]
+            cache[name] = {**c, "hit_ratio": c["hits"] / total if total else 0.0}
+
+        quota = {name: {**q, "low": _is_low(q)} for name, q in _quota.items()}
+
+        return {
+            "since": _started_at,
+            "reports": reports,
+            "cache": cache,
+            "quota": quota,
+            "quota_at": _quota_at,
+            "short_circuits": _short_circuits,
+        }
+
+
+def render_prometheus(breaker_state: str = "") -> str:
+    """Prometheus text exposition of `snapshot()`."""
+    snap = snapshot()
+    lines: List[str] = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+    reports = snap["reports"].items()
+    metric("ga4_report_calls_total", "counter", "GA4 report calls.",
+           [({"report": n}, s["calls"]) for n, s in reports])
+    metric("ga4_report_errors_total", "counter", "GA4 report calls that failed after retries.",
+           [({"report": n}, s["errors"]) for n, s in reports])
+    metric("ga4_report_retries_total", "counter", "GA4 report retry attempts.",
+           [({"report": n}, s["retries"]) for n, s in reports])
+    metric("ga4_report_latency_ms_sum", "counter", "Total GA4 report latency in milliseconds.",
+           [({"report": n}, round(s["total_ms"], 3)) for n, s in reports])
+    metric("ga4_report_latency_ms_max", "gauge", "Slowest GA4 report call in milliseconds.",
+           [({"report": n}, round(s["max_ms"], 3)) for n, s in reports])
+
+    quota = snap["quota"].items()
+    metric("ga4_quota_consumed", "gauge", "Tokens consumed by the last GA4 request, per quota bucket.",
+           [({"bucket": n}, q["consumed"]) for n, q in quota])
+    metric("ga4_quota_remaining", "gauge", "Tokens remaining in the GA4 quota bucket.",
+           [({"bucket": n}, q["remaining"]) for n, q in quota])
+
+    cache = snap["cache"].items()
+    metric("ga4_cache_hits_total", "counter", "Analytics widget cache hits.",
+           [({"widget": n}, c["hits"]) for n, c in cache])
+    metric("ga4_cache_misses_total", "counter", "Analytics widget cache misses.",
+           [({"widget": n}, c["misses"]) for n, c in cache])
+
+    metric("ga4_short_circuits_total", "counter", "GA4 calls skipped by the circuit breaker.",
+           [({}, snap["short_circuits"])])
+    if breaker_state:
+        metric("ga4_breaker_open", "gauge", "1 while the GA4 circuit breaker is open.",
+               [({}, int(breaker_state == "open"))])
+
+    return "\n".join(lines) + "\n"
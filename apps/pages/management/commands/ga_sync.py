@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.pages import warehouse
+
+
+class Command(BaseCommand):
+    help = "Copy missing / not-yet-final GA4 days into the local daily tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=warehouse.BACKFILL_DAYS,
+                            help="How many days back to keep in sync (default: %(default)s)")
+        parser.add_argument("--property", default="",
+                            help="GA4 property id (default: GA4_PROPERTY_ID)")
+
+    def handle(self, *args, **options):
+        property_id = options["property"] or warehouse.PROPERTY_ID
+        if not property_id:
+            self.stderr.write("GA4_PROPERTY_ID is not set.")
+            return
+
+        written = warehouse.sync(property_id=property_id, days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"[GA4] {written} day(s) synced for property {property_id}"))
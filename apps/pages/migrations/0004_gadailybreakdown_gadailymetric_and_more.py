@@ -0,0 +1,59 @@
+# Generated by Django 4.2.9 on 2026-10-18 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GaDailyBreakdown',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_id', models.CharField(max_length=32)),
+                ('dimension', models.CharField(choices=[('deviceCategory', 'Device'), ('country', 'Country')], max_length=32)),
+                ('date', models.DateField()),
+                ('value', models.CharField(max_length=255)),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('is_final', models.BooleanField(default=False)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['property_id', 'dimension', 'date', 'value'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GaDailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_id', models.CharField(max_length=32)),
+                ('date', models.DateField()),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('page_views', models.PositiveIntegerField(default=0)),
+                ('event_count', models.PositiveIntegerField(default=0)),
+                ('conversions', models.PositiveIntegerField(default=0)),
+                ('total_revenue', models.FloatField(default=0)),
+                ('engagement_duration', models.FloatField(default=0)),
+                ('is_final', models.BooleanField(default=False)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['property_id', 'date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='gadailymetric',
+            constraint=models.UniqueConstraint(fields=('property_id', 'date'), name='uniq_ga_daily_metric'),
+        ),
+        migrations.AddConstraint(
+            model_name='gadailybreakdown',
+            constraint=models.UniqueConstraint(fields=('property_id', 'dimension', 'date', 'value'), name='uniq_ga_daily_breakdown'),
+        ),
+    ]
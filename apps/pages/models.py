@@ -26,3 +26,60 @@ class Task(models.Model):
 
     def __str__(self):
         return f"{self.title} ({self.status})"
+
+
+class GaDailyMetric(models.Model):
+    """
+    One row per GA4 property and day. Local copy of the daily totals
+    so charts can read any range without calling the GA Data API.
+    """
+    property_id         = models.CharField(max_length=32)
+    date                = models.DateField()
+    sessions            = models.PositiveIntegerField(default=0)
+    active_users        = models.PositiveIntegerField(default=0)
+    new_users           = models.PositiveIntegerField(default=0)
+    page_views          = models.PositiveIntegerField(default=0)
+    event_count         = models.PositiveIntegerField(default=0)
+    conversions         = models.PositiveIntegerField(default=0)
+    total_revenue       = models.FloatField(default=0)
+    engagement_duration = models.FloatField(default=0)  # seconds
+    is_final            = models.BooleanField(default=False)  # GA stops revising the day
+    synced_at           = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["property_id", "date"]
+        constraints = [
+            models.UniqueConstraint(fields=["property_id", "date"], name="uniq_ga_daily_metric"),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} {self.date}"
+
+
+class GaDailyBreakdown(models.Model):
+    """
+    Sessions / active users per day for one dimension value
+    (e.g. deviceCategory=mobile, country=Germany).
+    """
+    class Dimension(models.TextChoices):
+        DEVICE  = "deviceCategory", "Device"
+        COUNTRY = "country", "Country"
+
+    property_id  = models.CharField(max_length=32)
+    dimension    = models.CharField(max_length=32, choices=Dimension.choices)
+    date         = models.DateField()
+    value        = models.CharField(max_length=255)
+    sessions     = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0)
+    is_final     = models.BooleanField(default=False)
+    synced_at    = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["property_id", "dimension", "date", "value"]
+        constraints = [
+            models.UniqueConstraint(fields=["property_id", "dimension", "date", "value"],
+                                    name="uniq_ga_daily_breakdown"),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} {self.dimension}={self.value} {self.date}"
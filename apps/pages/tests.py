@@ -1,3 +1,39 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from google.api_core.exceptions import PermissionDenied, ServiceUnavailable
+
+from . import ga
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.breaker = ga.CircuitBreaker(threshold=2, cooldown=0)
+        patcher = mock.patch.object(ga, "BREAKER", self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_failing(self, error):
+        def call():
+            raise error
+        return ga._safe_run(call, fallback="fallback")
+
+    def test_opens_after_threshold(self):
+        self.breaker.cooldown = 60
+        self.run_failing(ServiceUnavailable("down"))
+        self.run_failing(ServiceUnavailable("down"))
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(ga._safe_run(lambda: "live", fallback="fallback"), "fallback")
+
+    def test_half_open_trial_ends_on_non_transient_error(self):
+        self.run_failing(ServiceUnavailable("down"))
+        self.run_failing(ServiceUnavailable("down"))
+        self.assertEqual(self.breaker.state, "half-open")
+
+        self.assertEqual(self.run_failing(PermissionDenied("denied")), "fallback")
+        self.assertFalse(self.breaker.trial)
+
+        # the next call gets its trial and closes the breaker
+        self.assertEqual(ga._safe_run(lambda: "live", fallback="fallback"), "live")
+        self.assertEqual(self.breaker.state, "closed")
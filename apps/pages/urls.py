@@ -4,6 +4,9 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('analytics/', views.analytics, name='analytics'),
+    path('analytics/widgets/<str:widget>/', views.analytics_widget, name='analytics_widget'),
+    path('analytics/status/', views.ga_status, name='ga_status'),
+    path('analytics/metrics/', views.ga_metrics_export, name='ga_metrics'),
     path('task_management/', views.task_management, name='task_management'),
     path('campaigns/', views.campaigns, name='campaigns'),
     path('profile/', views.profile, name='profile'),   # ✅ final fixed route
@@ -5,12 +5,17 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.shortcuts import render, redirect
 # ----------------
-from django.utils.safestring import mark_safe
-import json
+from datetime import datetime, timezone as dt_timezone
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from . import ga_metrics
 from .ga import (
-    get_nonzero_overview_7d, get_timeseries_30d, get_devices_7d,
-    get_countries_7d, get_top_pages_7d, get_sources_7d, get_realtime_active
+    BREAKER, fallback_count, get_nonzero_overview_7d, get_top_pages_7d, get_sources_7d, get_realtime_active
 )
+from .warehouse import get_timeseries_30d, get_devices_7d, get_countries_7d
 
 
 
@@ -111,35 +116,101 @@ def assets(request):
 
 
 
-@login_required(login_url="/login/")
-def analytics(request):
-    realtime   = get_realtime_active()
-    metrics    = get_nonzero_overview_7d()           # already filtered > 0
-    series30   = get_timeseries_30d()
-    devices    = get_devices_7d()
-    countries  = get_countries_7d(limit=10)
-    pages      = get_top_pages_7d(limit=10)
-    sources    = get_sources_7d(limit=10)
-
+def _kpi_cards():
+    metrics = get_nonzero_overview_7d()           # already filtered > 0
     # prettify cards with icon/label/accent
     for i, m in enumerate(metrics):
         m["icon"]  = ICON_MAP.get(m["key"], "fas fa-dot-circle")
         m["label"] = LABEL_MAP.get(m["key"], m["key"])
         m["accent"]= ACCENTS[i % len(ACCENTS)]
+    return {"cards": metrics}
+
+
+def _series30():
+    series30 = get_timeseries_30d()
+    return {
+        "labels":      [r["date"] for r in series30],
+        "sessions":    [r["sessions"] for r in series30],
+        "activeUsers": [r["activeUsers"] for r in series30],
+    }
+
 
+def _chart(rows):
+    return {"labels": [r["label"] for r in rows], "values": [r["value"] for r in rows]}
+
+
+# Lifetime of widget data built from fallbacks while GA is failing
+FALLBACK_MAX_AGE = 15
+
+# Analytics widgets: name -> (loader, cache lifetime in seconds)
+ANALYTICS_WIDGETS = {
+    "realtime":  (lambda: {"active": get_realtime_active()}, 15),
+    "kpis":      (_kpi_cards, 300),
+    "series30":  (_series30, 900),
+    "devices":   (lambda: _chart(get_devices_7d()), 900),
+    "countries": (lambda: _chart(get_countries_7d(limit=10)), 900),
+    "pages":     (lambda: {"rows": get_top_pages_7d(limit=10)}, 300),
+    "sources":   (lambda: {"rows": [s for s in get_sources_7d(limit=10) if s["sessions"] > 0]}, 300),
+}
+
+
+@login_required(login_url="/login/")
+def analytics(request):
+    # Shell only: each widget loads itself from analytics_widget
     ctx = {
-        "realtime": realtime,
-        "metric_cards": metrics,                    # non-zero metrics only
-        "pages": pages,
-        "sources": [s for s in sources if s["sessions"] > 0],
-
-        # charts data
-        "series_labels_json":   mark_safe(json.dumps([r["date"] for r in series30])),
-        "series_sessions_json": mark_safe(json.dumps([r["sessions"] for r in series30])),
-        "series_users_json":    mark_safe(json.dumps([r["activeUsers"] for r in series30])),
-        "devices_labels_json":  mark_safe(json.dumps([d["label"] for d in devices])),
-        "devices_values_json":  mark_safe(json.dumps([d["value"] for d in devices])),
-        "countries_labels_json":mark_safe(json.dumps([c["label"] for c in countries])),
-        "countries_values_json":mark_safe(json.dumps([c["value"] for c in countries])),
+        "widget_urls": {name: reverse("analytics_widget", args=[name]) for name in ANALYTICS_WIDGETS},
+        "realtime_refresh_ms": ANALYTICS_WIDGETS["realtime"][1] * 1000,
     }
     return render(request, "pages/analytics.html", ctx)
+
+
+@login_required(login_url="/login/")
+def analytics_widget(request, widget):
+    if widget not in ANALYTICS_WIDGETS:
+        raise Http404("Unknown widget")
+
+    loader, max_age = ANALYTICS_WIDGETS[widget]
+    # GA data is the same for every user: share it through the server cache
+    key = f"analytics:widget:v2:{widget}"
+    cached = cache.get(key)
+    ga_metrics.record_cache(widget, cached is not None)
+    if cached is None:
+        fallbacks = fallback_count()
+        data = loader()
+        if fallback_count() != fallbacks:
+            # outage placeholders: retry soon instead of serving them for max_age
+            max_age = min(max_age, FALLBACK_MAX_AGE)
+        cache.set(key, (data, max_age), max_age)
+    else:
+        data, max_age = cached
+
+    response = JsonResponse(data)
+    patch_cache_control(response, private=True, max_age=max_age)
+    return response
+
+
+def _ts(epoch):
+    return datetime.fromtimestamp(epoch, tz=dt_timezone.utc) if epoch else None
+
+
+@staff_member_required(login_url="/login/")
+def ga_status(request):
+    snap = ga_metrics.snapshot()
+    ctx = {
+        **snap,
+        "since": _ts(snap["since"]),
+        "quota_at": _ts(snap["quota_at"]),
+        "breaker_state": BREAKER.state,
+        "breaker_failures": BREAKER.failures,
+        "segment": "analytics",
+    }
+    return render(request, "pages/ga_status.html", ctx)
+
+
+@staff_member_required(login_url="/login/")
+def ga_metrics_export(request):
+    # Prometheus text by default, ?format=json for the raw snapshot
+    if request.GET.get("format") == "json":
+        return JsonResponse({**ga_metrics.snapshot(), "breaker_state": BREAKER.state})
+    return HttpResponse(ga_metrics.render_prometheus(BREAKER.state),
+                        content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,357 @@
+# apps/pages/warehouse.py
+"""
+Local daily warehouse for GA4 data.
+
+Daily totals and device / country breakdowns are copied from the GA4
+Data API into GaDailyMetric / GaDailyBreakdown. `sync()` only requests
+days that are missing or not final yet (GA keeps revising the most
+recent days), so a regular run costs one small report per table.
+
+Charts and summaries read from the local tables:
+    get_timeseries(start, end)
+    get_timeseries_30d()
+    get_devices_7d()
+    get_countries_7d(limit=10)
+    get_totals(start, end)
+    get_monthly(months=12)
+    get_period_over_period(days=7)
+
+They never call GA themselves and stay empty until the tables are
+filled by:
+    python manage.py ga_sync
+which must run on a schedule (deploy.sh installs a 15 minute cron
+entry, render.yaml a cron job). It only requests missing / not yet
+final days, so frequent runs are cheap.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from google.analytics.data_v1beta.types import (
+    DateRange,
+    Metric,
+    Dimension,
+    RunReportRequest,
+)
+
+from .ga import PROPERTY_ID, _run_report, _safe_run, _to_int, _to_float
+from .models import GaDailyMetric, GaDailyBreakdown
+
+# -----------------------
+# Configuration
+# -----------------------
+BACKFILL_DAYS    = int(os.getenv("GA4_BACKFILL_DAYS", "400"))    # history kept by `ga_sync`
+FINAL_AFTER_DAYS = int(os.getenv("GA4_FINAL_AFTER_DAYS", "3"))   # GA stops revising after ~72h
+
+ROW_LIMIT = 250000  # GA4 maximum rows per report
+
+# GA4 metric -> GaDailyMetric column
+METRIC_COLUMNS = {
+    "sessions": "sessions",
+    "activeUsers": "active_users",
+    "newUsers": "new_users",
+    "screenPageViews": "page_views",
+    "eventCount": "event_count",
+    "conversions": "conversions",
+    "totalRevenue": "total_revenue",
+    "userEngagementDuration": "engagement_duration",
+}
+FLOAT_METRICS = ("totalRevenue", "userEngagementDuration")
+
+# Some properties reject a metric (e.g. "conversions"), retry with less
+METRIC_FALLBACKS = [
+    list(METRIC_COLUMNS),
+    ["sessions", "activeUsers", "newUsers", "screenPageViews", "eventCount"],
+    ["sessions", "activeUsers"],
+]
+
+
+def _parse_date(raw: str) -> date:
+    """GA4 `date` dimension is YYYYMMDD."""
+    return datetime.strptime(raw, "%Y%m%d").date()
+
+
+def _iter_days(start: date, end: date) -> Iterator[date]:
+    for i in range((end - start).days + 1):
+        yield start + timedelta(days=i)
+
+
+def _pending_ranges(property_id: str, today: date, days: int) -> List[Tuple[date, date]]:
+    """
+    Contiguous (start, end) ranges within the last `days` days that are
+    missing locally or not final yet.
+    """
+    start = today - timedelta(days=days - 1)
+    final = set(
+        GaDailyMetric.objects
+        .filter(property_id=property_id, date__gte=start, is_final=True)
+        .values_list("date", flat=True)
+    )
+
+    ranges: List[Tuple[date, date]] = []
+    for d in _iter_days(start, today):
+        if d in final:
+            continue
+        if ranges and ranges[-1][1] == d - timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], d)
+        else:
+            ranges.append((d, d))
+    return ranges
+
+
+# -----------------------
+# GA fetch
+# -----------------------
+
+def _fetch_daily(property_id: str, start: date, end: date) -> Optional[Dict[date, Dict[str, Any]]]:
+    """
+    Daily totals keyed by date, or None when GA could not be queried.
+    """
+    for metric_names in METRIC_FALLBACKS:
+        def _call():
+            req = RunReportRequest(
+                property=f"properties/{property_id}",
+                dimensions=[Dimension(name="date")],
+                metrics=[Metric(name=m) for m in metric_names],
+                date_ranges=[DateRange(start_date=start.isoformat(), end_date=end.isoformat())],
+                limit=ROW_LIMIT,
+            )
+            return _run_report(req)
+
+        res = _safe_run(_call, None)
+        if res is None:
+            continue
+
+        out: Dict[date, Dict[str, Any]] = {}
+        for r in res.rows:
+            values = {}
+            for i, key in enumerate(metric_names):
+                raw = r.metric_values[i].value
+                values[METRIC_COLUMNS[key]] = _to_float(raw) if key in FLOAT_METRICS else _to_int(raw)
+            out[_parse_date(r.dimension_values[0].value)] = values
+        return out
+
+    return None
+
+
+def _fetch_breakdown(property_id: str, dimension: str, start: date, end: date) -> Optional[List[Dict[str, Any]]]:
+    """
+    Sessions / active users per (date, dimension value), or None on error.
+    """
+    def _call():
+        req = RunReportRequest(
+            property=f"properties/{property_id}",
+            dimensions=[Dimension(name="date"), Dimension(name=dimension)],
+            metrics=[Metric(name="sessions"), Metric(name="activeUsers")],
+            date_ranges=[DateRange(start_date=start.isoformat(), end_date=end.isoformat())],
+            limit=ROW_LIMIT,
+        )
+        return _run_report(req)
+
+    res = _safe_run(_call, None)
+    if res is None:
+        return None
+
+    return [{
+        "date": _parse_date(r.dimension_values[0].value),
+        "value": (r.dimension_values[1].value or "(not set)")[:255],
+        "sessions": _to_int(r.metric_values[0].value),
+        "active_users": _to_int(r.metric_values[1].value),
+    } for r in res.rows]
+
+
+# -----------------------
+# Local store
+# -----------------------
+
+def _store_daily(property_id: str, start: date, end: date, rows: Dict[date, Dict[str, Any]], today: date):
+    # GA omits days without traffic: store them as zero so they are not fetched again
+    cutoff = today - timedelta(days=FINAL_AFTER_DAYS)
+    objs = [
+        GaDailyMetric(property_id=property_id, date=d, is_final=d <= cutoff, **rows.get(d, {}))
+        for d in _iter_days(start, end)
+    ]
+    GaDailyMetric.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["property_id", "date"],
+        update_fields=list(METRIC_COLUMNS.values()) + ["is_final", "synced_at"],
+    )
+
+
+def _store_breakdown(property_id: str, dimension: str, start: date, end: date,
+                     rows: List[Dict[str, Any]], today: date):
+    # Values can disappear between revisions, so replace the whole range
+    cutoff = today - timedelta(days=FINAL_AFTER_DAYS)
+    GaDailyBreakdown.objects.filter(
+        property_id=property_id, dimension=dimension, date__range=(start, end)
+    ).delete()
+    GaDailyBreakdown.objects.bulk_create([
+        GaDailyBreakdown(property_id=property_id, dimension=dimension,
+                         is_final=r["date"] <= cutoff, **r)
+        for r in rows
+    ], batch_size=1000)
+
+
+def sync(property_id: str = "", days: int = 0, today: Optional[date] = None) -> int:
+    """
+    Fetch missing / not-yet-final days of the last `days` days into the
+    local tables. Returns the number of days written.
+    """
+    property_id = property_id or PROPERTY_ID
+    if not property_id:
+        return 0
+
+    today = today or timezone.localdate()
+    written = 0
+
+    for start, end in _pending_ranges(property_id, today, days or BACKFILL_DAYS):
+        daily = _fetch_daily(property_id, start, end)
+        breakdowns = {
+            dim: _fetch_breakdown(property_id, dim, start, end)
+            for dim in GaDailyBreakdown.Dimension.values
+        }
+        # Keep the range pending unless every report came back
+        if daily is None or None in breakdowns.values():
+            break
+
+        with transaction.atomic():
+            _store_daily(property_id, start, end, daily, today)
+            for dim, rows in breakdowns.items():
+                _store_breakdown(property_id, dim, start, end, rows, today)
+
+        written += (end - start).days + 1
+
+    return written
+
+
+# -----------------------
+# Public API (used by views)
+# -----------------------
+
+def _metrics(start: date, end: date):
+    return GaDailyMetric.objects.filter(property_id=PROPERTY_ID, date__range=(start, end))
+
+
+def get_timeseries(start: date, end: date) -> List[Dict[str, Any]]:
+    """
+    One entry per day in [start, end] with every stored metric,
+    keyed by GA4 metric name. Days without data are zero.
+    """
+    if not PROPERTY_ID:
+        return []
+
+    columns = list(METRIC_COLUMNS.values())
+    stored = {r["date"]: r for r in _metrics(start, end).values("date", *columns)}
+
+    out: List[Dict[str, Any]] = []
+    for d in _iter_days(start, end):
+        row = stored.get(d, {})
+        out.append({"date": d.isoformat(),
+                    **{key: row.get(col, 0) for key, col in METRIC_COLUMNS.items()}})
+    return out
+
+
+def get_timeseries_30d() -> List[Dict[str, Any]]:
+    """
+    Line series: sessions & activeUsers by date for last 30 days.
+    """
+    today = timezone.localdate()
+    return get_timeseries(today - timedelta(days=30), today)
+
+
+def get_totals(start: date, end: date) -> Dict[str, Any]:
+    """
+    Sum of every metric over [start, end], keyed by GA4 metric name.
+    User counts are summed per day, so users active on several days
+    are counted once per day.
+    """
+    if not PROPERTY_ID:
+        return {}
+
+    agg = _metrics(start, end).aggregate(**{key: Sum(col) for key, col in METRIC_COLUMNS.items()})
+    return {key: value or 0 for key, value in agg.items()}
+
+
+def get_monthly(months: int = 12) -> List[Dict[str, Any]]:
+    """
+    Monthly totals for the last `months` calendar months (current included).
+    """
+    if not PROPERTY_ID:
+        return []
+
+    today = timezone.localdate()
+    first = today.replace(day=1)
+    for _ in range(months - 1):
+        first = (first - timedelta(days=1)).replace(day=1)
+
+    rows = (
+        _metrics(first, today)
+        .annotate(month=TruncMonth("date"))
+        .values("month")
+        .annotate(**{key: Sum(col) for key, col in METRIC_COLUMNS.items()})
+        .order_by("month")
+    )
+    return [{**r, "month": r["month"].strftime("%Y-%m")} for r in rows]
+
+
+def get_period_over_period(days: int = 7) -> Dict[str, Any]:
+    """
+    Totals of the last `days` days vs the `days` before them,
+    with the relative change in percent (None when the base is zero).
+    """
+    today = timezone.localdate()
+    cur_start = today - timedelta(days=days - 1)
+    prev_end = cur_start - timedelta(days=1)
+    prev_start = prev_end - timedelta(days=days - 1)
+
+    current = get_totals(cur_start, today)
+    previous = get_totals(prev_start, prev_end)
+    change = {
+        key: (round((current[key] - previous[key]) * 100.0 / previous[key], 1) if previous.get(key) else None)
+        for key in current
+    }
+    return {"current": current, "previous": previous, "change": change}
+
+
+def get_breakdown(dimension: str, start: date, end: date, limit: int = 0) -> List[Dict[str, Any]]:
+    """
+    Sessions per dimension value over [start, end], highest first.
+    """
+    if not PROPERTY_ID:
+        return []
+
+    rows = (
+        GaDailyBreakdown.objects
+        .filter(property_id=PROPERTY_ID, dimension=dimension, date__range=(start, end))
+        .values("value")
+        .annotate(total=Sum("sessions"))
+        .order_by("-total", "value")
+    )
+    if limit:
+        rows = rows[:limit]
+    return [{"label": r["value"], "value": r["total"]} for r in rows if r["total"]]
+
+
+def get_devices_7d() -> List[Dict[str, Any]]:
+    """
+    Doughnut: sessions by deviceCategory (same 28 day window as the former live query).
+    """
+    today = timezone.localdate()
+    return get_breakdown(GaDailyBreakdown.Dimension.DEVICE, today - timedelta(days=28), today)
+
+
+def get_countries_7d(limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Bar: sessions by country (7d).
+    """
+    today = timezone.localdate()
+    return get_breakdown(GaDailyBreakdown.Dimension.COUNTRY, today - timedelta(days=7), today, limit)
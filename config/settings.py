@@ -86,6 +86,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apps.dyn_dt.instrumentation.QueryBudgetMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -145,6 +146,17 @@ else:
         }
     }
 
+# -------------------- CACHE ------------------------------
+# Shared by every gunicorn worker and the dyn_dt export worker of the host:
+# dyn_dt invalidates counts, summaries and table configs through it. Use
+# Redis / Memcached (CACHE_BACKEND, CACHE_LOCATION) when running on several hosts.
+CACHES = {
+    'default': {
+        'BACKEND' : os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    }
+}
+
 # -------------------- AUTH / PASSWORD ---------------------
 AUTH_PASSWORD_VALIDATORS = [
     { "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator" },
@@ -171,6 +183,10 @@ STATICFILES_DIRS = [
 # For production
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Uploaded / generated files (background exports land in MEDIA_ROOT/exports)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / "media"
+
 DEBUG = True
 
 
@@ -184,10 +200,28 @@ LOGIN_REDIRECT_URL = '/'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 # ------------- DYNAMIC_DATATB / DYNAMIC_API --------------
+# Entries are a model path or a dict of options, e.g.
+#   'task': {'model': "projects.models.Task", 'pagination': 'keyset'}
 DYNAMIC_DATATB = {
     'product': "apps.pages.models.Product",
 }
 
+# Queries a dyn_dt page may run before its budget log line becomes a warning
+DYNAMIC_DATATB_QUERY_BUDGET = 15
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'apps.dyn_dt.instrumentation': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Lists are paginated; dict entries can set 'page_size', 'max_page_size'
+# and 'pagination': 'cursor' (see apps/dyn_api/pagination.py)
 DYNAMIC_API = {
     'product': "apps.pages.models.Product",
 }
@@ -44,6 +44,15 @@ python manage.py migrate --noinput
 log "Collecting static files"
 python manage.py collectstatic --noinput
 
+# --- GA4 warehouse -----------------------------------------------------------
+# Analytics charts read only the local GA tables; ga_sync fills them.
+log "Syncing GA4 warehouse"
+python manage.py ga_sync || log "GA4 sync failed; the cron job below retries"
+
+log "Scheduling GA4 sync every 15 minutes"
+GA_SYNC_CRON="*/15 * * * * cd $APP && $VENV/bin/python manage.py ga_sync >> $APP/ga_sync.log 2>&1"
+( crontab -l 2>/dev/null | grep -v 'manage.py ga_sync' || true; echo "$GA_SYNC_CRON" ) | crontab -
+
 # --- Restart application -----------------------------------------------------
 log "Restarting Gunicorn service"
 sudo systemctl restart mydjango
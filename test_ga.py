@@ -1,20 +1,29 @@
+"""
+GA4 connectivity check.
+
+    python test_ga.py
+
+Uses the same client as the dashboard (apps.pages.ga.get_client), so it
+also runs offline:
+
+    GA4_CLIENT_BACKEND=apps.pages.ga_fake.FakeAnalyticsDataClient GA4_PROPERTY_ID=0 python test_ga.py
+"""
 import os
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
 from google.analytics.data_v1beta.types import DateRange, Metric, RunReportRequest
-from google.oauth2 import service_account
 
-creds = service_account.Credentials.from_service_account_file(
-    os.getenv("GOOGLE_APPLICATION_CREDENTIALS"),
-    scopes=["https://www.googleapis.com/auth/analytics.readonly"]
-)
+from apps.pages.ga import get_client
+
+
+def main():
+    request = RunReportRequest(
+        property=f"properties/{os.getenv('GA4_PROPERTY_ID')}",
+        date_ranges=[DateRange(start_date="yesterday", end_date="today")],
+        metrics=[Metric(name="activeUsers")]
+    )
 
-client = BetaAnalyticsDataClient(credentials=creds)
+    response = get_client().run_report(request)
+    print("Active users yesterday:", response.rows[0].metric_values[0].value)
 
-request = RunReportRequest(
-    property=f"properties/{os.getenv('GA4_PROPERTY_ID')}",
-    date_ranges=[DateRange(start_date="yesterday", end_date="today")],
-    metrics=[Metric(name="activeUsers")]
-)
 
-response = client.run_report(request)
-print("Active users yesterday:", response.rows[0].metric_values[0].value)
+if __name__ == "__main__":
+    main()